@@ -155,6 +155,10 @@ class Vendor(models.Model):
         - If user is the primary owner (vendor_profile), return that vendor
         - Else, if user is linked via VendorUser (staff), return that vendor
         - Else, return None
+
+        Cheap to call at the top of every view: the owner's vendor_profile is
+        joined in by VendorTokenAuthentication and the staff lookup is remembered
+        on the request's user, so neither runs more than one query per request.
         """
         # Primary owner relationship (existing behavior)
         try:
@@ -165,16 +169,24 @@ class Vendor(models.Model):
             # user has no vendor_profile relation
             pass
 
-        # Staff/secondary accounts via VendorUser
+        # Staff/secondary accounts via VendorUser - remembered on the user instance
+        # (a fresh one per request), so repeated checks don't re-run the membership query
+        try:
+            return user._staff_vendor
+        except AttributeError:
+            pass
+
+        vendor = None
         try:
             # Avoid circular import by using reverse relation name
             membership = user.vendor_memberships.filter(is_active=True).select_related('vendor').first()
             if membership:
-                return membership.vendor
+                vendor = membership.vendor
         except Exception:
             pass
 
-        return None
+        user._staff_vendor = vendor
+        return vendor
 
     def is_user_owner(self, user):
         """
@@ -1,7 +1,7 @@
 import logging
 import traceback
 from rest_framework.views import exception_handler
-from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, PermissionDenied
 from rest_framework import status
 from rest_framework.response import Response
 
@@ -10,7 +10,9 @@ error_logger = logging.getLogger('errors')
 def custom_exception_handler(exc, context):
     """
     Custom exception handler to return user-friendly error messages
-    Also logs errors with full stack traces
+    Also logs errors with full stack traces (except expected auth/permission
+    denials such as a missing token or a pending vendor - the API log already
+    records their 401/403, and devices poll with them)
     """
     response = exception_handler(exc, context)
     
@@ -22,17 +24,18 @@ def custom_exception_handler(exc, context):
     method = request.method if request else 'unknown'
     
     # Log the error with full stack trace
-    error_logger.error(
-        f"Error in {method} {path} | User: {username} | "
-        f"Exception: {type(exc).__name__}: {str(exc)}",
-        exc_info=True,
-        extra={
-            'path': path,
-            'method': method,
-            'user': username,
-            'exception_type': type(exc).__name__,
-        }
-    )
+    if not isinstance(exc, (NotAuthenticated, PermissionDenied)):
+        error_logger.error(
+            f"Error in {method} {path} | User: {username} | "
+            f"Exception: {type(exc).__name__}: {str(exc)}",
+            exc_info=True,
+            extra={
+                'path': path,
+                'method': method,
+                'user': username,
+                'exception_type': type(exc).__name__,
+            }
+        )
 
     if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
         return Response(
@@ -1,8 +1,25 @@
 """
-Custom middleware for API request/response logging
+Custom middleware for API request/response logging and compressed request bodies
 """
+import io
 import time
 import logging
+import zlib
+
+from django.conf import settings
+from django.http import JsonResponse
+
+try:
+    import brotli  # Optional: pip install 'brotli>=1.2'
+    # Older versions can't cap the decoded size (no output_buffer_limit) - treat them as missing
+    brotli.Decompressor().process(b'', output_buffer_limit=1)
+except (ImportError, TypeError):
+    brotli = None
+
+DECOMPRESSION_ERRORS = (zlib.error, brotli.error) if brotli else (zlib.error,)
+
+# Decoded size limit when DATA_UPLOAD_MAX_MEMORY_SIZE is disabled (None)
+DEFAULT_DECOMPRESSED_MAX_SIZE = 50 * 1024 * 1024
 
 logger = logging.getLogger('api')
 
@@ -52,3 +69,70 @@ class APILoggingMiddleware:
             ip = request.META.get('REMOTE_ADDR')
         return ip
 
+
+class RequestDecompressionMiddleware:
+    """
+    Decodes gzip (and brotli, if installed) compressed request bodies
+    
+    Lets the mobile app send large offline sync payloads compressed
+    (Content-Encoding: gzip | br). Views keep reading request.data as usual.
+    Both the compressed and the decoded body are limited to
+    DECOMPRESSED_REQUEST_MAX_SIZE (defaults to DATA_UPLOAD_MAX_MEMORY_SIZE,
+    the limit Django applies to uncompressed bodies).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.max_size = (
+            getattr(settings, 'DECOMPRESSED_REQUEST_MAX_SIZE', None)
+            or settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+            or DEFAULT_DECOMPRESSED_MAX_SIZE
+        )
+
+    def __call__(self, request):
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding in ('gzip', 'br'):
+            error_response = self.decompress_body(request, encoding)
+            if error_response:
+                return error_response
+        
+        return self.get_response(request)
+    
+    def decompress_body(self, request, encoding):
+        """Replace the compressed body with the decoded one (returns an error response on failure)"""
+        if encoding == 'br' and brotli is None:
+            return JsonResponse({'error': 'Content-Encoding br is not supported'}, status=415)
+        
+        # The compressed body is never larger than the decoded limit either - don't read past it
+        compressed = request.read(self.max_size + 1)
+        if len(compressed) > self.max_size:
+            return JsonResponse({'error': 'Request body is too large'}, status=413)
+        
+        try:
+            # Cap the output so a tiny compressed body can't expand without limit
+            if encoding == 'gzip':
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                body = decompressor.decompress(compressed, self.max_size + 1)
+                finished = decompressor.eof
+            else:
+                body, finished = self.decompress_brotli(compressed)
+            if not finished and len(body) <= self.max_size:
+                raise zlib.error(f'truncated {encoding} stream')
+        except DECOMPRESSION_ERRORS as e:
+            logger.warning(f"Invalid {encoding} request body: {request.method} {request.path} | {e}")
+            return JsonResponse({'error': f'Invalid {encoding} request body'}, status=400)
+        
+        if len(body) > self.max_size:
+            return JsonResponse({'error': 'Decompressed request body is too large'}, status=413)
+        
+        # Hand the decoded body to the rest of the stack as if it was sent uncompressed
+        request._body = body
+        request._stream = io.BytesIO(body)
+        request.META['CONTENT_LENGTH'] = str(len(body))
+        del request.META['HTTP_CONTENT_ENCODING']
+        return None
+    
+    def decompress_brotli(self, compressed):
+        """Decode a brotli body, stopping once it passes max_size - returns (body, finished)"""
+        decompressor = brotli.Decompressor()
+        body = decompressor.process(compressed, output_buffer_limit=self.max_size + 1)
+        return body, decompressor.is_finished()
@@ -0,0 +1,26 @@
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+from auth_app.models import Vendor
+
+
+class IsApprovedVendor(BasePermission):
+    """
+    Allows access only to users (owner or staff) of an approved vendor
+
+    Sets request.vendor, so views read the vendor from there instead of looking
+    it up and repeating the approval check in every method.
+    """
+
+    def has_permission(self, request, view):
+        vendor = Vendor.get_vendor_for_user(request.user)
+        if not vendor:
+            raise PermissionDenied({'error': 'Vendor profile not found'})
+
+        if not vendor.is_approved or not request.user.is_active:
+            raise PermissionDenied({
+                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
+            })
+
+        request.vendor = vendor
+        return True
@@ -0,0 +1,142 @@
+from django.test import TestCase, RequestFactory, override_settings
+from django.http import HttpResponse
+from django.contrib.auth.models import User
+from unittest import mock, skipUnless
+import gzip
+import json
+
+from backend import middleware
+from backend.middleware import RequestDecompressionMiddleware
+
+
+class RequestDecompressionMiddlewareTestCase(TestCase):
+    """Test decoding of compressed request bodies"""
+    
+    def setUp(self):
+        self.factory = RequestFactory()
+        # Echo the body the view would see
+        self.middleware = RequestDecompressionMiddleware(lambda request: HttpResponse(request.body))
+    
+    def post(self, body, encoding):
+        """Helper to run a POST with a Content-Encoding through the middleware"""
+        request = self.factory.post('/backup/sync', data=body, content_type='application/json',
+                                    HTTP_CONTENT_ENCODING=encoding)
+        return self.middleware(request)
+    
+    def test_gzip_body_is_decoded(self):
+        """gzip bodies reach the view decoded, without the Content-Encoding header"""
+        body = json.dumps([{'invoice_number': 'INV-001'}]).encode()
+        request = self.factory.post('/backup/sync', data=gzip.compress(body), content_type='application/json',
+                                    HTTP_CONTENT_ENCODING='gzip')
+        
+        response = self.middleware(request)
+        
+        self.assertEqual(response.content, body)
+        self.assertEqual(request.META['CONTENT_LENGTH'], str(len(body)))
+        self.assertNotIn('HTTP_CONTENT_ENCODING', request.META)
+    
+    def test_uncompressed_body_untouched(self):
+        """Requests without a supported Content-Encoding pass through as is"""
+        response = self.post(b'{"a": 1}', 'identity')
+        
+        self.assertEqual(response.content, b'{"a": 1}')
+    
+    def test_invalid_gzip_body(self):
+        """Corrupt and truncated gzip bodies are rejected with a 400"""
+        for body in (b'not gzip', gzip.compress(b'{"a": 1}' * 100)[:-10]):
+            response = self.post(body, 'gzip')
+            
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.content), {'error': 'Invalid gzip request body'})
+    
+    @override_settings(DECOMPRESSED_REQUEST_MAX_SIZE=1024)
+    def test_decompressed_body_too_large(self):
+        """Bodies that expand past DECOMPRESSED_REQUEST_MAX_SIZE get a 413"""
+        self.middleware = RequestDecompressionMiddleware(lambda request: HttpResponse(request.body))
+        
+        response = self.post(gzip.compress(b'0' * 2048), 'gzip')
+        
+        self.assertEqual(response.status_code, 413)
+    
+    @override_settings(DECOMPRESSED_REQUEST_MAX_SIZE=1024)
+    def test_compressed_body_too_large(self):
+        """Compressed bodies past the limit are rejected before decoding"""
+        self.middleware = RequestDecompressionMiddleware(lambda request: HttpResponse(request.body))
+        
+        response = self.post(b'\x00' * 2048, 'gzip')
+        
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(json.loads(response.content), {'error': 'Request body is too large'})
+    
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=4096)
+    def test_limit_defaults_to_upload_max_memory_size(self):
+        """Without DECOMPRESSED_REQUEST_MAX_SIZE the Django upload limit applies"""
+        self.middleware = RequestDecompressionMiddleware(lambda request: HttpResponse(request.body))
+        
+        self.assertEqual(self.middleware.max_size, 4096)
+        self.assertEqual(self.post(gzip.compress(b'0' * 4097), 'gzip').status_code, 413)
+        self.assertEqual(self.post(gzip.compress(b'0' * 4096), 'gzip').status_code, 200)
+    
+    @skipUnless(middleware.brotli, 'brotli is not installed')
+    def test_brotli_body_is_decoded(self):
+        """br bodies reach the view decoded"""
+        body = json.dumps([{'invoice_number': 'INV-001'}]).encode()
+        
+        response = self.post(middleware.brotli.compress(body), 'br')
+        
+        self.assertEqual(response.content, body)
+    
+    @skipUnless(middleware.brotli, 'brotli is not installed')
+    @override_settings(DECOMPRESSED_REQUEST_MAX_SIZE=64 * 1024)
+    def test_brotli_bomb(self):
+        """A tiny br body that expands past the limit gets a 413 without being fully decoded"""
+        self.middleware = RequestDecompressionMiddleware(lambda request: HttpResponse(request.body))
+        bomb = middleware.brotli.compress(b'0' * (64 * 1024 * 1024))
+        decoded_sizes = []
+        real_decompressor = middleware.brotli.Decompressor
+        
+        def spy_decompressor():
+            """Record how much each process() call decodes"""
+            decompressor = real_decompressor()
+            spy = mock.Mock(wraps=decompressor)
+            def process(data, **kwargs):
+                body = decompressor.process(data, **kwargs)
+                decoded_sizes.append(len(body))
+                return body
+            spy.process.side_effect = process
+            return spy
+        
+        with mock.patch.object(middleware.brotli, 'Decompressor', spy_decompressor):
+            response = self.post(bomb, 'br')
+        
+        self.assertEqual(response.status_code, 413)
+        self.assertTrue(decoded_sizes)
+        self.assertLessEqual(sum(decoded_sizes), 2 * 64 * 1024)
+    
+    @skipUnless(middleware.brotli, 'brotli is not installed')
+    def test_invalid_brotli_body(self):
+        """Corrupt and truncated br bodies are rejected with a 400"""
+        for body in (b'not brotli', middleware.brotli.compress(b'{"a": 1}' * 1000)[:-4]):
+            response = self.post(body, 'br')
+            
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.content), {'error': 'Invalid br request body'})
+    
+    def test_brotli_not_installed(self):
+        """br bodies get a 415 when the brotli package is missing"""
+        with mock.patch.object(middleware, 'brotli', None):
+            response = self.post(b'\x00', 'br')
+        
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(json.loads(response.content), {'error': 'Content-Encoding br is not supported'})
+    
+    def test_gzip_login(self):
+        """A gzip compressed JSON body is parsed by the API views"""
+        User.objects.create_user(username='testuser', password='test123')
+        body = gzip.compress(json.dumps({'username': 'testuser', 'password': 'test123'}).encode())
+        
+        response = self.client.post('/auth/login', data=body, content_type='application/json',
+                                    HTTP_CONTENT_ENCODING='gzip')
+        
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['username'], 'testuser')
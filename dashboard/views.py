@@ -194,7 +194,8 @@ def dashboard_sales(request):
     # Calculate total discount from percentage (discount_amount is now a property, not a field)
     # Discount is applied to subtotal (before tax)
     total_discount = Decimal('0')
-    for bill in bills:
+    # Only the two columns used here - skip the wide printing/customer snapshot columns
+    for bill in bills.only('subtotal', 'discount_percentage'):
         if bill.discount_percentage > 0:
             discount_amount = (bill.subtotal * bill.discount_percentage / 100).quantize(Decimal('0.01'))
             total_discount += discount_amount
@@ -564,7 +565,10 @@ def dashboard_dues(request):
     # Calculate pending payments (credit bills or bills where amount_paid < total_amount)
     # Handle None values properly - use Coalesce to treat None as 0
     from django.db.models.functions import Coalesce
-    credit_bills = bills.annotate(
+    credit_bills = bills.only(
+        'id', 'invoice_number', 'bill_date', 'customer_name', 'customer_phone',
+        'total_amount', 'amount_paid', 'payment_mode'
+    ).annotate(
         amount_paid_value=Coalesce('amount_paid', Decimal('0'), output_field=DecimalField())
     ).filter(
         Q(payment_mode='credit') | Q(amount_paid_value__lt=F('total_amount'))
@@ -147,6 +147,9 @@ class ItemListView(APIView):
                 Q(barcode__icontains=search)
             )
         
+        # vendor_name and the category fields are read per item - load them up front
+        items = items.select_related('vendor').prefetch_related('categories')
+        
         serializer = ItemSerializer(items, many=True, context={'request': request})
         return Response(serializer.data)
     
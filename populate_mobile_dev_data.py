@@ -7,6 +7,7 @@ import os
 import sys
 import django
 import uuid
+import zlib
 import requests
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -19,12 +20,55 @@ django.setup()
 
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Max, IntegerField
+from django.db.models.functions import Cast, Substr
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from auth_app.models import Vendor
 from items.models import Category, Item
 from sales.models import Bill, BillItem, SalesBackup
 from rest_framework.authtoken.models import Token
 
+# Upper bound on downloaded image size - some sources serve multi-MB originals
+MAX_IMAGE_BYTES = 2_000_000
+
+SESSION = requests.Session()
+
+# Downloaded image bytes keyed by URL - several items share the same source image
+_IMAGE_CACHE = {}
+
+def picsum_url(item_name):
+    """
+    Deterministic Picsum URL for an item.
+
+    Uses a stable adler32 seed (hash() is randomized per process) and the
+    /seed/ path so the same item always maps to the same image across runs.
+    """
+    seed = zlib.adler32(item_name.encode()) % 1000
+    return f'https://picsum.photos/seed/{seed}/400/400'
+
+def fetch_image_bytes(url, headers, min_size=0):
+    """
+    Download image bytes with a hard size cap.
+
+    Streams the response and reads at most MAX_IMAGE_BYTES + 1 bytes so an
+    oversized original is rejected without ever being buffered or decoded.
+
+    Returns:
+        bytes or None: Image data, or None if the download failed, was too
+        small, or exceeded MAX_IMAGE_BYTES
+    """
+    if url in _IMAGE_CACHE:
+        return _IMAGE_CACHE[url]
+    with SESSION.get(url, stream=True, timeout=(3, 10), headers=headers, allow_redirects=True) as response:
+        if response.status_code != 200:
+            return None
+        data = response.raw.read(MAX_IMAGE_BYTES + 1, decode_content=True)
+    if len(data) <= min_size or len(data) > MAX_IMAGE_BYTES:
+        return None
+    _IMAGE_CACHE[url] = data
+    return data
+
 def download_vendor_logo():
     """Download a restaurant logo image"""
     try:
@@ -33,10 +77,10 @@ def download_vendor_logo():
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(url, timeout=15, headers=headers, allow_redirects=True)
+        data = fetch_image_bytes(url, headers, min_size=1000)
         
-        if response.status_code == 200 and response.content and len(response.content) > 1000:
-            img = Image.open(BytesIO(response.content))
+        if data:
+            img = Image.open(BytesIO(data))
             if img.mode != 'RGB':
                 img = img.convert('RGB')
             
@@ -205,9 +249,9 @@ def download_food_image(item_name, item_type='veg'):
     # Get URL for this item
     url = food_image_urls.get(item_name)
     
-    # If no specific URL, use Picsum (random but reliable)
+    # If no specific URL, use Picsum (seeded per item, reliable)
     if not url:
-        url = f'https://picsum.photos/400/400?random={hash(item_name) % 1000}'
+        url = picsum_url(item_name)
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -215,12 +259,12 @@ def download_food_image(item_name, item_type='veg'):
     
     # Try primary URL
     try:
-        response = requests.get(url, timeout=15, headers=headers, allow_redirects=True)
+        data = fetch_image_bytes(url, headers, min_size=5000)
         
-        if response.status_code == 200 and response.content and len(response.content) > 5000:
+        if data:
             # Verify it's an image
             try:
-                img = Image.open(BytesIO(response.content))
+                img = Image.open(BytesIO(data))
                 # Convert to RGB if needed
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
@@ -248,11 +292,11 @@ def download_food_image(item_name, item_type='veg'):
     
     # Fallback: Use Picsum (always works)
     try:
-        fallback_url = f'https://picsum.photos/400/400?random={hash(item_name) % 1000}'
-        response = requests.get(fallback_url, timeout=15, headers=headers, allow_redirects=True)
+        fallback_url = picsum_url(item_name)
+        data = fetch_image_bytes(fallback_url, headers, min_size=5000)
         
-        if response.status_code == 200 and response.content and len(response.content) > 5000:
-            img = Image.open(BytesIO(response.content))
+        if data:
+            img = Image.open(BytesIO(data))
             if img.mode != 'RGB':
                 img = img.convert('RGB')
             img = img.resize((400, 400), Image.Resampling.LANCZOS)
@@ -565,8 +609,9 @@ def create_comprehensive_items(vendor, categories):
                 should_update_image = True
         
         if should_update_image:
+            # Reuse the image downloaded above instead of fetching it a second time
+            image_file = item_data.get('image')
             try:
-                image_file = download_food_image(item_data['name'], veg_nonveg)
                 if image_file:
                     item.image = image_file
                     item.save()
@@ -600,12 +645,19 @@ def create_comprehensive_items(vendor, categories):
     # Return total items processed (not just newly created)
     return total_items
 
+@transaction.atomic
 def create_sample_bills(vendor):
     """Create sample bills using new Bill and BillItem models (GST and Non-GST)"""
     print("\n🧾 Creating sample bills...")
     
     # Get some items for bills
-    items = Item.objects.filter(vendor=vendor, is_active=True)[:5]
+    # Evaluate once and load only the columns copied onto the bill lines
+    items = list(
+        Item.objects.filter(vendor=vendor, is_active=True).only(
+            'id', 'name', 'description', 'price', 'mrp_price', 'price_type',
+            'hsn_code', 'hsn_gst_percentage', 'veg_nonveg'
+        )[:5]
+    )
     if not items:
         print("  ⚠️ No items found. Skipping bill creation.")
         return
@@ -616,21 +668,15 @@ def create_sample_bills(vendor):
     year = bill_date.year
     
     # Find the highest invoice number for this vendor in this year
-    existing_bills = Bill.objects.filter(
+    # (single scalar aggregate - only matches the INV-{year}-{n} sample format so the cast is safe)
+    prefix = f'INV-{year}-'
+    last_num = Bill.objects.filter(
         vendor=vendor,
-        invoice_number__startswith=f'INV-{year}-'
-    ).order_by('-invoice_number')
-    
-    if existing_bills.exists():
-        # Extract the highest number
-        last_bill = existing_bills.first()
-        try:
-            last_num = int(last_bill.invoice_number.split('-')[-1])
-            next_num = last_num + 1
-        except:
-            next_num = 1
-    else:
-        next_num = 1
+        invoice_number__regex=rf'^{prefix}[0-9]+$'
+    ).aggregate(
+        mx=Max(Cast(Substr('invoice_number', len(prefix) + 1), IntegerField()))
+    )['mx']
+    next_num = (last_num or 0) + 1
     
     # Generate invoice numbers
     gst_invoice_number = f'INV-{year}-{next_num:03d}'
@@ -652,7 +698,7 @@ def create_sample_bills(vendor):
     sgst = total_tax / 2
     total = subtotal + total_tax
     
-    gst_bill = Bill.objects.create(
+    gst_bill = Bill(
         vendor=vendor,
         device_id='mobile-dev-device-001',
         invoice_number=gst_invoice_number,
@@ -674,13 +720,16 @@ def create_sample_bills(vendor):
         created_at=created_at
     )
     
+    # Collect bill lines for both bills and insert them together at the end
+    bill_items = []
+    
     # Create bill items
     for item in gst_items:
         quantity = Decimal('2.00')
         item_subtotal = item.mrp_price * quantity
         item_gst = (item_subtotal * item.hsn_gst_percentage / 100) if item.price_type == 'exclusive' else Decimal('0.00')
         
-        BillItem.objects.create(
+        bill_items.append(BillItem(
             bill=gst_bill,
             item=item,
             original_item_id=item.id,
@@ -696,16 +745,14 @@ def create_sample_bills(vendor):
             gst_percentage=item.hsn_gst_percentage or Decimal('0'), # Calculated from HSN
             item_gst_amount=item_gst,
             veg_nonveg=item.veg_nonveg,
-        )
+        ))
 
-    print(f"  ✓ Created GST Bill: {gst_bill.invoice_number} (₹{gst_bill.total_amount:.2f})")
-    
     # Sample Non-GST Bill
     non_gst_items = items[3:5]
     non_gst_subtotal = sum(float(item.mrp_price) for item in non_gst_items)
     non_gst_total = non_gst_subtotal
     
-    non_gst_bill = Bill.objects.create(
+    non_gst_bill = Bill(
         vendor=vendor,
         device_id='mobile-dev-device-001',
         invoice_number=non_gst_invoice_number,
@@ -732,7 +779,7 @@ def create_sample_bills(vendor):
         quantity = Decimal('1.00')
         item_subtotal = item.mrp_price * quantity
         
-        BillItem.objects.create(
+        bill_items.append(BillItem(
             bill=non_gst_bill,
             item=item,
             original_item_id=item.id,
@@ -746,8 +793,13 @@ def create_sample_bills(vendor):
             gst_percentage=Decimal('0.00'),  # No GST for non-GST bills
             item_gst_amount=Decimal('0.00'),
             veg_nonveg=item.veg_nonveg,
-        )
+        ))
 
+    # Two INSERTs for everything (ids are client-side UUIDs, so the items can reference the bills)
+    Bill.objects.bulk_create([gst_bill, non_gst_bill])
+    BillItem.objects.bulk_create(bill_items)
+    
+    print(f"  ✓ Created GST Bill: {gst_bill.invoice_number} (₹{gst_bill.total_amount:.2f})")
     print(f"  ✓ Created Non-GST Bill: {non_gst_bill.invoice_number} (₹{non_gst_bill.total_amount:.2f})")
     
     print(f"\n  ✅ Created 2 sample bills (1 GST, 1 Non-GST)")
@@ -759,17 +811,19 @@ def main():
     print("="*70)
     
     try:
-        # Create vendor
-        vendor = create_mobile_dev_vendor()
-        
-        # Create categories
-        categories = create_comprehensive_categories(vendor)
-        
-        # Create items
-        items_count = create_comprehensive_items(vendor, categories)
-        
-        # Create sample bills
-        create_sample_bills(vendor)
+        # Seed everything in one transaction - a failure part way leaves nothing half-seeded
+        with transaction.atomic():
+            # Create vendor
+            vendor = create_mobile_dev_vendor()
+            
+            # Create categories
+            categories = create_comprehensive_categories(vendor)
+            
+            # Create items
+            items_count = create_comprehensive_items(vendor, categories)
+            
+            # Create sample bills
+            create_sample_bills(vendor)
         
         # Get token for API access
         token = Token.objects.get(user=vendor.user)
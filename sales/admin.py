@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from .models import Bill, BillItem, SalesBackup
 
 class BillItemInline(admin.TabularInline):
@@ -17,6 +18,10 @@ class BillAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'created_at', 'synced_at', 'updated_at', 'item_count', 'total_quantity']
     inlines = [BillItemInline]
     date_hierarchy = 'bill_date'
+    list_select_related = ['vendor', 'vendor__user']
+    # Skip the extra unfiltered COUNT(*) the changelist runs for "N total"
+    show_full_result_count = False
+    list_per_page = 50
     
     fieldsets = (
         ('Bill Information', {
@@ -55,8 +60,14 @@ class BillAdmin(admin.ModelAdmin):
     )
     
     def item_count(self, obj):
-        return obj.items.count()
+        return obj._item_count
     item_count.short_description = 'Items'
+    item_count.admin_order_field = '_item_count'
+    
+    def get_queryset(self, request):
+        """Annotate item count so the changelist doesn't run a COUNT per bill"""
+        qs = super().get_queryset(request)
+        return qs.select_related('vendor', 'vendor__user').annotate(_item_count=Count('items'))
 
 @admin.register(BillItem)
 class BillItemAdmin(admin.ModelAdmin):
@@ -64,6 +75,9 @@ class BillItemAdmin(admin.ModelAdmin):
     list_filter = ['veg_nonveg', 'price_type', 'created_at']
     search_fields = ['item_name', 'bill__invoice_number', 'bill__vendor__business_name']
     readonly_fields = ['id', 'created_at']
+    list_select_related = ['bill', 'bill__vendor', 'bill__vendor__user']
+    show_full_result_count = False
+    list_per_page = 50
     
     fieldsets = (
         ('Item Information', {
@@ -85,6 +99,10 @@ class BillItemAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('bill', 'bill__vendor', 'bill__vendor__user')
 
 @admin.register(SalesBackup)
 class SalesBackupAdmin(admin.ModelAdmin):
@@ -93,6 +111,8 @@ class SalesBackupAdmin(admin.ModelAdmin):
     list_filter = ['synced_at', 'created_at', 'vendor']
     search_fields = ['device_id', 'vendor__business_name']
     readonly_fields = ['id', 'synced_at', 'created_at']
+    show_full_result_count = False
+    list_per_page = 50
     
     fieldsets = (
         ('Legacy Bill Data', {
@@ -104,3 +124,8 @@ class SalesBackupAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # bill_data is the full mobile JSON blob - not shown in the list, only loaded on the change form
+        return qs.select_related('vendor', 'vendor__user').defer('bill_data')
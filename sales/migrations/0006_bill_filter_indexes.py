@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_billitem_hsn_code_billitem_hsn_gst_percentage_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['vendor', 'billing_mode', '-bill_date'], name='bill_vendor_mode_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['vendor', 'payment_mode', '-bill_date'], name='bill_vendor_paymode_date_idx'),
+        ),
+    ]
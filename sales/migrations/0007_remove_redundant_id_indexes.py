@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_bill_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bill',
+            name='sales_bill_id_7ff068_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='billitem',
+            name='sales_billi_id_039bc2_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='salesbackup',
+            name='sales_sales_id_1badf8_idx',
+        ),
+    ]
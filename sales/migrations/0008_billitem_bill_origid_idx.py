@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_remove_redundant_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='billitem',
+            name='billitem_original_item_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='billitem',
+            index=models.Index(fields=['bill', 'original_item_id'], name='billitem_bill_origid_idx'),
+        ),
+    ]
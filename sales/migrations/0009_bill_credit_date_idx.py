@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_billitem_bill_origid_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(condition=models.Q(('payment_mode', 'credit')), fields=['vendor', '-bill_date'], name='bill_credit_date_idx'),
+        ),
+    ]
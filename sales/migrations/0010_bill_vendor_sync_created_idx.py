@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_bill_credit_date_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bill',
+            name='sales_bill_vendor__fd06cb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['vendor', '-synced_at', '-created_at'], name='bill_vendor_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['vendor', '-created_at', '-bill_date'], name='bill_vendor_created_idx'),
+        ),
+    ]
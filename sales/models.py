@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q, Sum
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
@@ -80,9 +81,16 @@ class Bill(models.Model):
     class Meta:
         ordering = ['-synced_at', '-created_at']
         indexes = [
-            models.Index(fields=['id']),
-            models.Index(fields=['vendor', 'synced_at']),
+            # /backup/sync orders by -synced_at, -created_at (and filters on synced_at >= since);
+            # /bills/ orders by -created_at, -bill_date - both can walk these in order and stop at the limit
+            models.Index(fields=['vendor', '-synced_at', '-created_at'], name='bill_vendor_sync_idx'),
+            models.Index(fields=['vendor', '-created_at', '-bill_date'], name='bill_vendor_created_idx'),
             models.Index(fields=['vendor', 'bill_date']),
+            # /bills/ filters by vendor + billing/payment mode and sorts by date
+            models.Index(fields=['vendor', 'billing_mode', '-bill_date'], name='bill_vendor_mode_date_idx'),
+            models.Index(fields=['vendor', 'payment_mode', '-bill_date'], name='bill_vendor_paymode_date_idx'),
+            # Dues dashboard only looks at credit bills - keep that index limited to them
+            models.Index(fields=['vendor', '-bill_date'], name='bill_credit_date_idx', condition=Q(payment_mode='credit')),
             models.Index(fields=['invoice_number']),
             models.Index(fields=['billing_mode']),
             models.Index(fields=['device_id']),
@@ -95,13 +103,23 @@ class Bill(models.Model):
     
     @property
     def item_count(self):
-        """Get total number of items in this bill"""
+        """
+        Get total number of items in this bill
+        Prefer annotating _item_count on the queryset when listing bills
+        """
+        if hasattr(self, '_item_count'):
+            return self._item_count
         return self.items.count()
     
     @property
     def total_quantity(self):
-        """Get total quantity of all items"""
-        return sum(item.quantity for item in self.items.all())
+        """
+        Get total quantity of all items (summed in the database)
+        Prefer annotating _total_quantity on the queryset when listing bills
+        """
+        if hasattr(self, '_total_quantity'):
+            return self._total_quantity or 0
+        return self.items.aggregate(total=Sum('quantity'))['total'] or 0
     
     @property
     def discount_amount(self):
@@ -163,10 +181,9 @@ class BillItem(models.Model):
     class Meta:
         ordering = ['created_at']
         indexes = [
-            models.Index(fields=['id']),
             models.Index(fields=['bill', 'created_at']),
             models.Index(fields=['item']),
-            models.Index(fields=['original_item_id'], name='billitem_original_item_id_idx'),
+            models.Index(fields=['bill', 'original_item_id'], name='billitem_bill_origid_idx'),
         ]
     
     def __str__(self):
@@ -194,7 +211,6 @@ class SalesBackup(models.Model):
     class Meta:
         ordering = ['-synced_at']
         indexes = [
-            models.Index(fields=['id']),
             models.Index(fields=['vendor', 'synced_at']),
             models.Index(fields=['device_id']),
         ]
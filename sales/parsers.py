@@ -0,0 +1,29 @@
+"""
+Request parsers for sales endpoints
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    # Optional: pip install orjson (several times faster on large sync uploads)
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class SyncJSONParser(JSONParser):
+    """
+    JSON parser for bulk bill uploads
+
+    Uses orjson when it is installed and falls back to DRF's stdlib-based
+    JSONParser otherwise, so behaviour is the same either way.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
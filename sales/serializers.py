@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.db import transaction
 from .models import Bill, BillItem, SalesBackup
 from items.models import Item
 
@@ -23,7 +24,7 @@ class BillSerializer(serializers.ModelSerializer):
     items = BillItemSerializer(many=True, read_only=True)
     items_data = BillItemSerializer(many=True, write_only=True, required=False, help_text="Items to create with this bill")
     vendor_name = serializers.CharField(source='vendor.business_name', read_only=True)
-    item_count = serializers.IntegerField(source='items.count', read_only=True)
+    item_count = serializers.SerializerMethodField()
     total_quantity = serializers.SerializerMethodField()
     
     class Meta:
@@ -50,22 +51,32 @@ class BillSerializer(serializers.ModelSerializer):
         # Value should be UUID (from vendor.id)
         return value
     
+    def get_item_count(self, obj):
+        """Number of items (uses the _item_count annotation when the queryset provides it)"""
+        if hasattr(obj, '_item_count'):
+            return obj._item_count
+        return obj.items.count()
+    
     def get_total_quantity(self, obj):
-        """Calculate total quantity of all items"""
-        return sum(item.quantity for item in obj.items.all())
+        """Total quantity of all items (Bill.total_quantity uses the annotation or a SUM query)"""
+        return obj.total_quantity
     
+    @transaction.atomic(savepoint=False)  # Callers like BillListView.post already run this in a transaction
     def create(self, validated_data):
         """Create bill with items"""
         items_data = validated_data.pop('items_data', [])
         # Vendor should be in validated_data (set by view)
         bill = Bill.objects.create(**validated_data)
         
-        # Create bill items
-        for item_data in items_data:
-            BillItem.objects.create(bill=bill, **item_data)
+        # Create bill items in a single batched INSERT
+        BillItem.objects.bulk_create(
+            [BillItem(bill=bill, **item_data) for item_data in items_data],
+            batch_size=500
+        )
         
         return bill
     
+    @transaction.atomic(savepoint=False)
     def update(self, instance, validated_data):
         """Update bill (items are typically not updated after creation)"""
         items_data = validated_data.pop('items_data', None)
@@ -82,8 +93,10 @@ class BillSerializer(serializers.ModelSerializer):
         if items_data is not None:
             # Delete existing items and create new ones
             instance.items.all().delete()
-            for item_data in items_data:
-                BillItem.objects.create(bill=instance, **item_data)
+            BillItem.objects.bulk_create(
+                [BillItem(bill=instance, **item_data) for item_data in items_data],
+                batch_size=500
+            )
         
         return instance
 
@@ -91,7 +104,7 @@ class BillSerializer(serializers.ModelSerializer):
 class BillListSerializer(serializers.ModelSerializer):
     """Simplified serializer for listing bills"""
     vendor_name = serializers.CharField(source='vendor.business_name', read_only=True)
-    item_count = serializers.IntegerField(source='items.count', read_only=True)
+    item_count = serializers.IntegerField(read_only=True)  # Bill.item_count reads the _item_count annotation
     
     class Meta:
         model = Bill
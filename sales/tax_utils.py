@@ -6,35 +6,45 @@ import os
 from decimal import Decimal
 from django.conf import settings
 
-# Load HSN to GST mapping (for reference/validation only)
-HSN_MAPPING = None
-SAC_MAPPING = None
+_ZERO = Decimal('0')
+_Q = Decimal('0.01')
+
+
+def _load_mapping(filename):
+    """Load a code -> GST mapping JSON file shipped with this app"""
+    file_path = os.path.join(os.path.dirname(__file__), filename)
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _sac_default_rate(entry):
+    """Default GST rate for a SAC entry ('default' may be a rate or just a true flag)"""
+    default_rate = entry.get('default')
+    if isinstance(default_rate, bool) or default_rate is None:
+        return entry.get('gst_percentage', 0)
+    return default_rate
+
+
+# Load HSN/SAC to GST mappings once at import (for reference/validation only)
+HSN_MAPPING = _load_mapping('hsn_to_gst_mapping.json')
+SAC_MAPPING = _load_mapping('sac_to_gst_mapping.json')
+
+# Rates pre-converted to Decimal so lookups on the billing path are plain dict gets
+_HSN_GST = {code: Decimal(str(entry['gst_percentage'])) for code, entry in HSN_MAPPING.items()}
+_SAC_GST = {code: Decimal(str(_sac_default_rate(entry))) for code, entry in SAC_MAPPING.items()}
 
 def load_hn_mapping():
     """Load HSN to GST mapping from JSON file (for reference only)"""
-    global HSN_MAPPING
-    if HSN_MAPPING is None:
-        file_path = os.path.join(os.path.dirname(__file__), 'hsn_to_gst_mapping.json')
-        try:
-            with open(file_path, 'r') as f:
-                HSN_MAPPING = json.load(f)
-        except FileNotFoundError:
-            HSN_MAPPING = {}
     return HSN_MAPPING
 
 def load_sac_mapping():
     """Load SAC to GST mapping from JSON file (for reference only)"""
-    global SAC_MAPPING
-    if SAC_MAPPING is None:
-        file_path = os.path.join(os.path.dirname(__file__), 'sac_to_gst_mapping.json')
-        try:
-            with open(file_path, 'r') as f:
-                SAC_MAPPING = json.load(f)
-        except FileNotFoundError:
-            SAC_MAPPING = {}
     return SAC_MAPPING
 
-def get_default_gst_from_hn(hn_code):
+def get_default_gst_from_hn(hsn_code):
     """
     Get default GST percentage from HSN code mapping (for reference/validation)
     
@@ -45,15 +55,8 @@ def get_default_gst_from_hn(hn_code):
         Decimal: Default GST percentage from mapping, or 0 if not found
     """
     if not hsn_code:
-        return Decimal('0')
-    
-    mapping = load_hn_mapping()
-    hsn_str = str(hsn_code).strip()
-    
-    if hsn_str in mapping:
-        return Decimal(str(mapping[hsn_str]['gst_percentage']))
-    
-    return Decimal('0')
+        return _ZERO
+    return _HSN_GST.get(str(hsn_code).strip(), _ZERO)
 
 def get_default_gst_from_sac(sac_code):
     """
@@ -66,16 +69,8 @@ def get_default_gst_from_sac(sac_code):
         Decimal: Default GST percentage from mapping, or 0 if not found
     """
     if not sac_code:
-        return Decimal('0')
-    
-    mapping = load_sac_mapping()
-    sac_str = str(sac_code).strip()
-    
-    if sac_str in mapping:
-        default_rate = mapping[sac_str].get('default', mapping[sac_str].get('gst_percentage', 0))
-        return Decimal(str(default_rate))
-    
-    return Decimal('0')
+        return _ZERO
+    return _SAC_GST.get(str(sac_code).strip(), _ZERO)
 
 def calculate_item_tax(item_subtotal, hsn_code=None, hsn_gst_percentage=None, sac_code=None, sac_gst_percentage=None):
     """
@@ -99,21 +94,21 @@ def calculate_item_tax(item_subtotal, hsn_code=None, hsn_gst_percentage=None, sa
     # If vendor has SAC, use SAC rate for all items
     if sac_code:
         if sac_gst_percentage is not None:
-            gst_percentage = Decimal(str(sac_gst_percentage))
+            gst_percentage = sac_gst_percentage if isinstance(sac_gst_percentage, Decimal) else Decimal(str(sac_gst_percentage))
         else:
             # Use default from mapping
             gst_percentage = get_default_gst_from_sac(sac_code)
     # Else use item's HSN code
     elif hsn_code:
         if hsn_gst_percentage is not None:
-            gst_percentage = Decimal(str(hsn_gst_percentage))
+            gst_percentage = hsn_gst_percentage if isinstance(hsn_gst_percentage, Decimal) else Decimal(str(hsn_gst_percentage))
         else:
             # Use default from mapping
             gst_percentage = get_default_gst_from_hn(hsn_code)
     else:
-        gst_percentage = Decimal('0')
+        gst_percentage = _ZERO
     
     # Calculate tax
-    tax_amount = (item_subtotal * gst_percentage / 100).quantize(Decimal('0.01'))
+    tax_amount = (item_subtotal * gst_percentage / 100).quantize(_Q)
     return tax_amount, gst_percentage
 
@@ -1,3 +1,538 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from datetime import date, datetime, timedelta
+from django.utils import timezone
+from unittest import mock
+from decimal import Decimal
+import base64
+import json
+import uuid
 
-# Create your tests here.
+from auth_app.models import Vendor
+from sales.models import Bill, BillItem
+from sales.serializers import BillSerializer
+from sales.utils import generate_bill_number, generate_bill_numbers
+from sales import views as sales_views
+
+
+class VendorPermissionTestCase(TestCase):
+    """Test vendor approval checks on the sync and bill endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        
+        # Create pending (not yet approved) vendor
+        self.user = User.objects.create_user(username='pendingvendor', password='test123')
+        self.vendor = Vendor.objects.create(
+            user=self.user,
+            business_name='Pending Restaurant',
+            gst_no='29PEND1234F1Z5',
+            is_approved=False
+        )
+        
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def test_pending_vendor_forbidden_without_error_log(self):
+        """Pending vendors get a 403 without a traceback in errors.log"""
+        for url in ('/backup/sync', '/bills/'):
+            with self.assertNoLogs('errors', level='ERROR'):
+                response = self.client.get(url)
+            
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            self.assertIn('pending approval', response.data['error'])
+    
+    def test_missing_token_keeps_custom_401(self):
+        """Unauthenticated requests still get the login message"""
+        self.client.credentials()
+        
+        with self.assertNoLogs('errors', level='ERROR'):
+            response = self.client.get('/bills/')
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['error'], 'Authentication required. Please login.')
+
+
+class BillTotalQuantityTestCase(TestCase):
+    """Test Bill.total_quantity and its serialized value"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testvendor', password='test123')
+        self.vendor = Vendor.objects.create(user=self.user, business_name='Test Restaurant', is_approved=True)
+        self.bill = Bill.objects.create(
+            vendor=self.vendor,
+            invoice_number='INV-001',
+            bill_date=date.today(),
+            subtotal=Decimal('0.00'),
+            total_amount=Decimal('0.00')
+        )
+    
+    def test_empty_bill_total_quantity_is_zero(self):
+        """A bill without items reports an int 0, as before"""
+        self.assertIs(type(self.bill.total_quantity), int)
+        self.assertEqual(self.bill.total_quantity, 0)
+        self.assertEqual(BillSerializer(self.bill).data['total_quantity'], 0)
+    
+    def test_total_quantity_sums_items(self):
+        """Quantities of all items are summed"""
+        for quantity in (Decimal('1.500'), Decimal('2.000')):
+            BillItem.objects.create(
+                bill=self.bill,
+                item_name='Tea',
+                price=Decimal('10.00'),
+                mrp_price=Decimal('10.00'),
+                quantity=quantity,
+                subtotal=quantity * 10
+            )
+        
+        self.assertEqual(self.bill.total_quantity, Decimal('3.500'))
+
+
+class BillNumberTestCase(TestCase):
+    """Test server-side sequential bill number generation"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testvendor', password='test123')
+        self.vendor = Vendor.objects.create(
+            user=self.user,
+            business_name='Test Restaurant',
+            bill_prefix='INV',
+            is_approved=True
+        )
+        self.now = datetime(2026, 1, 27, 12, 0)
+    
+    def test_sequential_numbers(self):
+        """Each call takes the next number and keeps the vendor instance in sync"""
+        self.assertEqual(generate_bill_number(self.vendor, now=self.now), ('INV-2026-01-27-0001', 'INV-0001'))
+        self.assertEqual(generate_bill_number(self.vendor, now=self.now), ('INV-2026-01-27-0002', 'INV-0002'))
+        
+        self.assertEqual(self.vendor.last_bill_number, 2)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.last_bill_number, 2)
+    
+    def test_first_number_uses_starting_number(self):
+        """The first bill starts at bill_starting_number; raising it later doesn't skip ahead"""
+        Vendor.objects.filter(pk=self.vendor.pk).update(bill_starting_number=500)
+        self.assertEqual(generate_bill_number(self.vendor, now=self.now)[1], 'INV-0500')
+        
+        Vendor.objects.filter(pk=self.vendor.pk).update(bill_starting_number=900)
+        self.assertEqual(generate_bill_number(self.vendor, now=self.now)[1], 'INV-0501')
+    
+    def test_reads_current_counter_from_database(self):
+        """A stale vendor instance still gets the next number from the database row"""
+        stale_vendor = Vendor.objects.get(pk=self.vendor.pk)
+        generate_bill_number(self.vendor, now=self.now)
+        
+        self.assertEqual(generate_bill_number(stale_vendor, now=self.now)[1], 'INV-0002')
+    
+    def test_reserve_range(self):
+        """generate_bill_numbers reserves a consecutive range in one UPDATE"""
+        generate_bill_number(self.vendor, now=self.now)
+        
+        with self.assertNumQueries(1):
+            numbers = generate_bill_numbers(self.vendor, 3, now=self.now)
+        
+        self.assertEqual([bill_number for _, bill_number in numbers], ['INV-0002', 'INV-0003', 'INV-0004'])
+        self.assertEqual(generate_bill_number(self.vendor, now=self.now)[1], 'INV-0005')
+    
+    def test_reserve_empty_range(self):
+        """Reserving no numbers doesn't touch the counter"""
+        with self.assertNumQueries(0):
+            self.assertEqual(generate_bill_numbers(self.vendor, 0), [])
+        
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.last_bill_number, 0)
+    
+    def test_no_transaction_around_allocation(self):
+        """Allocation is the UPDATE alone - no savepoint/transaction statements around it"""
+        with self.assertNumQueries(1) as ctx:
+            generate_bill_number(self.vendor, now=self.now)
+        
+        self.assertTrue(ctx.captured_queries[0]['sql'].lstrip().upper().startswith('UPDATE'))
+    
+    def test_deleted_vendor(self):
+        """A vendor whose row is gone raises Vendor.DoesNotExist"""
+        vendor = Vendor.objects.get(pk=self.vendor.pk)
+        Vendor.objects.filter(pk=self.vendor.pk).delete()
+        
+        with self.assertRaises(Vendor.DoesNotExist):
+            generate_bill_number(vendor, now=self.now)
+    
+    def test_uses_vendor_database(self):
+        """The UPDATE runs on the database the vendor was loaded from"""
+        with mock.patch('sales.utils.router.db_for_write', return_value='default') as db_for_write:
+            generate_bill_number(self.vendor, now=self.now)
+        
+        db_for_write.assert_called_once_with(Vendor, instance=self.vendor)
+    
+    def test_range_shares_one_date(self):
+        """All numbers of a range are dated from the single `now` passed in"""
+        numbers = generate_bill_numbers(self.vendor, 2, now=datetime(2025, 12, 31, 23, 59, 59))
+        
+        self.assertEqual([invoice_number for invoice_number, _ in numbers],
+                         ['INV-2025-12-31-0001', 'INV-2025-12-31-0002'])
+    
+    def test_create_bill_retry_keeps_date(self):
+        """POST /bills/ retries a taken number with the date it started with"""
+        Bill.objects.create(
+            vendor=self.vendor,
+            invoice_number='INV-2026-01-27-0001',
+            bill_date=self.now.date(),
+            subtotal=Decimal('0.00'),
+            total_amount=Decimal('0.00')
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+        
+        # A clock that crosses midnight right after the first read
+        with mock.patch('sales.views.timezone') as mock_timezone:
+            mock_timezone.now.side_effect = [self.now] + [self.now + timedelta(days=1)] * 10
+            response = client.post('/bills/', {
+                'bill_date': '2026-01-27',
+                'billing_mode': 'non_gst',
+                'payment_mode': 'cash',
+                'items_data': [{'item_name': 'Tea', 'price': 10, 'mrp_price': 10, 'quantity': 1, 'subtotal': 10}],
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['invoice_number'], 'INV-2026-01-27-0002')
+        self.assertEqual(mock_timezone.now.call_count, 1)
+    
+    def test_prefix_formatting(self):
+        """Prefixes are trimmed and upper-cased, default to INV, and numbers pad to 4 digits"""
+        Vendor.objects.filter(pk=self.vendor.pk).update(bill_prefix=' rest ', last_bill_number=9998)
+        
+        self.assertEqual(generate_bill_numbers(self.vendor, 2, now=self.now), [
+            ('REST-2026-01-27-9999', 'REST-9999'),
+            ('REST-2026-01-27-10000', 'REST-10000'),
+        ])
+        
+        Vendor.objects.filter(pk=self.vendor.pk).update(bill_prefix=None, last_bill_number=6)
+        self.assertEqual(generate_bill_number(self.vendor, now=self.now), ('INV-2026-01-27-0007', 'INV-0007'))
+
+
+class BillPatchTestCase(TestCase):
+    """Test PATCH /bills/<id>/ header-only updates"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testvendor', password='test123')
+        self.vendor = Vendor.objects.create(user=self.user, business_name='Test Restaurant', is_approved=True)
+        self.client.force_authenticate(self.user)
+        
+        self.bill = Bill.objects.create(
+            vendor=self.vendor,
+            invoice_number='INV-001',
+            bill_date=date.today(),
+            restaurant_name='Test Restaurant',
+            customer_name='Old Customer',
+            subtotal=Decimal('100.00'),
+            total_amount=Decimal('100.00')
+        )
+        BillItem.objects.create(
+            bill=self.bill,
+            item_name='Tea',
+            price=Decimal('50.00'),
+            mrp_price=Decimal('50.00'),
+            quantity=Decimal('2.000'),
+            subtotal=Decimal('100.00')
+        )
+    
+    def test_header_patch_updates_only_sent_columns(self):
+        """Only the sent fields (and the timestamps) are written; items are kept"""
+        old_updated_at = self.bill.updated_at
+        # Changed behind the view's back - a full-row save would overwrite it
+        Bill.objects.filter(pk=self.bill.pk).update(restaurant_name='Renamed Restaurant')
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(f'/bills/{self.bill.id}/', {'customer_name': 'New Customer'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['customer_name'], 'New Customer')
+        self.assertEqual(response.data['item_count'], 1)
+        self.assertEqual(len(response.data['items']), 1)
+        
+        updates = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('UPDATE "sales_bill"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"restaurant_name"', updates[0])
+        
+        self.bill.refresh_from_db()
+        self.assertEqual(self.bill.customer_name, 'New Customer')
+        self.assertEqual(self.bill.restaurant_name, 'Renamed Restaurant')
+        self.assertGreater(self.bill.updated_at, old_updated_at)
+        self.assertEqual(self.bill.items.count(), 1)
+    
+    def test_header_patch_validation_error(self):
+        """Invalid values are still rejected without writing anything"""
+        response = self.client.patch(f'/bills/{self.bill.id}/', {'customer_email': 'not-an-email'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('customer_email', response.data)
+        self.bill.refresh_from_db()
+        self.assertIsNone(self.bill.customer_email)
+
+
+def sync_bill(invoice_number, **bill_data):
+    """Helper to build one POST /backup/sync entry with a single item"""
+    return {
+        'device_id': 'device-1',
+        'bill_data': {
+            'invoice_number': invoice_number,
+            'bill_date': '2026-01-27',
+            'timestamp': '2026-01-27T10:00:00Z',
+            'billing_mode': 'non_gst',
+            'items': [{'name': 'Tea', 'price': 10, 'mrp_price': 10, 'quantity': 2, 'subtotal': 20,
+                       'hsn_code': '0902', 'hsn_gst_percentage': 5}],
+            'subtotal': 20,
+            'total': 20,
+            'payment_mode': 'cash',
+            **bill_data,
+        },
+    }
+
+
+class SalesSyncUploadTestCase(TestCase):
+    """Test POST /backup/sync"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testvendor', password='test123')
+        self.vendor = Vendor.objects.create(user=self.user, business_name='Test Restaurant', is_approved=True)
+        self.client.force_authenticate(self.user)
+    
+    def test_sync_creates_bills_with_items(self):
+        """New bills and their items are stored and counted"""
+        response = self.client.post('/backup/sync', [sync_bill('INV-001'), sync_bill('INV-002')], format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['synced'], 2)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([bill['invoice_number'] for bill in response.data['bills']], ['INV-001', 'INV-002'])
+        self.assertEqual(response.data['bills'][0]['items'][0]['item_name'], 'Tea')
+        self.assertEqual(BillItem.objects.filter(bill__vendor=self.vendor).count(), 2)
+    
+    def test_duplicates_within_and_across_batches(self):
+        """Repeated and already-synced invoice numbers are returned, not created again"""
+        Bill.objects.create(vendor=self.vendor, invoice_number='INV-000', bill_date=date(2026, 1, 26),
+                            subtotal=Decimal('10.00'), total_amount=Decimal('10.00'))
+        payload = [sync_bill('INV-000'), sync_bill('INV-001'), sync_bill('INV-001'), sync_bill('INV-002'),
+                   sync_bill('INV-001')]
+        
+        with mock.patch.object(sales_views, 'SYNC_BATCH_SIZE', 2):
+            response = self.client.post('/backup/sync', payload, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['synced'], 5)
+        self.assertEqual(response.data['created'], 2)
+        ids = [bill['id'] for bill in response.data['bills']]
+        self.assertEqual(ids[1], ids[2])
+        self.assertEqual(ids[1], ids[4])
+        self.assertEqual(Bill.objects.filter(vendor=self.vendor).count(), 3)
+        self.assertEqual(BillItem.objects.filter(bill__vendor=self.vendor).count(), 2)
+    
+    def test_conflicting_insert_not_counted_as_created(self):
+        """A bill inserted concurrently (ignored by the INSERT) is returned as stored, not created"""
+        real_bulk_create = Bill.objects.bulk_create
+        stored_bill = None
+        
+        def bulk_create_after_concurrent_sync(bills, **kwargs):
+            nonlocal stored_bill
+            # Another request stores INV-002 between the lookup and the INSERT
+            stored_bill = Bill.objects.create(vendor=self.vendor, invoice_number='INV-002', bill_date=date(2026, 1, 27),
+                                              subtotal=Decimal('20.00'), total_amount=Decimal('20.00'))
+            return real_bulk_create(bills, **kwargs)
+        
+        with mock.patch.object(Bill.objects, 'bulk_create', side_effect=bulk_create_after_concurrent_sync):
+            response = self.client.post('/backup/sync', [sync_bill('INV-001'), sync_bill('INV-002')], format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['synced'], 2)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['bills'][1]['id'], str(stored_bill.id))
+        self.assertNotIn('errors', response.data)
+        # The skipped bill's items are not attached to the stored bill
+        self.assertEqual(stored_bill.items.count(), 0)
+    
+    def test_database_error_falls_back_per_bill(self):
+        """A bill the database rejects is reported; the rest of the batch is still saved"""
+        bad_bill = sync_bill('INV-002', items=[{'name': None, 'price': 10, 'quantity': 1, 'hsn_code': '0902', 'hsn_gst_percentage': 5}])
+        
+        response = self.client.post('/backup/sync', [sync_bill('INV-001'), bad_bill, sync_bill('INV-003')], format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['synced'], 2)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([bill['invoice_number'] for bill in response.data['bills']], ['INV-001', 'INV-003'])
+        self.assertEqual([error['bill_data'] for error in response.data['errors']], ['INV-002'])
+        self.assertEqual(
+            sorted(Bill.objects.filter(vendor=self.vendor).values_list('invoice_number', flat=True)),
+            ['INV-001', 'INV-003']
+        )
+    
+    def test_only_invalid_bills(self):
+        """A payload without any syncable bill is a 400 listing the errors"""
+        response = self.client.post('/backup/sync', [{'bill_data': {'bill_id': 'abc'}}], format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['synced'], 0)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['errors'][0]['bill'], 'abc')
+    
+    def test_brief_duplicates_response(self):
+        """duplicates=brief returns already-synced bills as stubs and new bills in full"""
+        self.client.post('/backup/sync', [sync_bill('INV-001')], format='json')
+        payload = [sync_bill('INV-001'), sync_bill('INV-002')]
+        
+        full = self.client.post('/backup/sync', payload, format='json').data
+        brief = self.client.post('/backup/sync?duplicates=brief', [sync_bill('INV-001'), sync_bill('INV-003')],
+                                 format='json').data
+        
+        self.assertEqual(brief['synced'], 2)
+        self.assertEqual(brief['created'], 1)
+        self.assertEqual(brief['bills'][0], {
+            'id': full['bills'][0]['id'],
+            'invoice_number': 'INV-001',
+            'status': 'already_synced',
+        })
+        # New bills keep the full representation
+        self.assertEqual(set(brief['bills'][1]), set(full['bills'][1]))
+        self.assertEqual(brief['bills'][1]['invoice_number'], 'INV-003')
+    
+    def test_ack_response(self):
+        """response=ack returns id/invoice_number/synced_at/status for every bill, without items"""
+        self.client.post('/backup/sync', [sync_bill('INV-001')], format='json')
+        
+        response = self.client.post('/backup/sync?response=ack', [sync_bill('INV-001'), sync_bill('INV-002')],
+                                    format='json')
+        full = self.client.post('/backup/sync', [sync_bill('INV-001'), sync_bill('INV-002')], format='json').data
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['synced'], 2)
+        self.assertEqual(response.data['created'], 1)
+        data = response.json()
+        self.assertEqual([bill['status'] for bill in data['bills']], ['already_synced', 'created'])
+        for ack, full_bill in zip(data['bills'], full['bills']):
+            self.assertEqual(set(ack), {'id', 'invoice_number', 'synced_at', 'status'})
+            self.assertEqual(ack['id'], full_bill['id'])
+            self.assertEqual(ack['invoice_number'], full_bill['invoice_number'])
+            self.assertEqual(ack['synced_at'], full_bill['synced_at'])
+
+
+class SalesSyncDownloadTestCase(TestCase):
+    """Test GET /backup/sync"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testvendor', password='test123')
+        self.vendor = Vendor.objects.create(user=self.user, business_name='Test Restaurant', is_approved=True)
+        self.client.force_authenticate(self.user)
+        
+        # Bills synced in one upload share synced_at - and some also share created_at
+        synced_at = timezone.now()
+        created_at = synced_at - timedelta(hours=1)
+        for i in range(7):
+            bill = Bill.objects.create(vendor=self.vendor, invoice_number=f'INV-{i:03d}', bill_date=date(2026, 1, 27),
+                                       subtotal=Decimal('10.00'), total_amount=Decimal('10.00'))
+            BillItem.objects.create(bill=bill, item_name='Tea', price=Decimal('10.00'), mrp_price=Decimal('10.00'),
+                                    quantity=Decimal('1.000'), subtotal=Decimal('10.00'))
+        Bill.objects.filter(vendor=self.vendor).update(synced_at=synced_at, created_at=created_at)
+        Bill.objects.filter(invoice_number__in=['INV-005', 'INV-006']).update(created_at=created_at - timedelta(minutes=1))
+    
+    def test_page_token_walks_all_bills_once(self):
+        """Following next_page_token visits every bill exactly once, in order"""
+        expected = list(
+            Bill.objects.filter(vendor=self.vendor).order_by('-synced_at', '-created_at', '-id').values_list('id', flat=True)
+        )
+        seen = []
+        url = '/backup/sync?limit=2'
+        for _ in range(10):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+            seen.extend(uuid.UUID(bill['id']) for bill in response.data['bills'])
+            if not response.data['next_page_token']:
+                break
+            url = f"/backup/sync?limit=2&page_token={response.data['next_page_token']}"
+        
+        self.assertEqual(seen, expected)
+    
+    def test_new_bill_does_not_shift_pages(self):
+        """Bills synced after the first page don't repeat or skip bills on the next page"""
+        first = self.client.get('/backup/sync?limit=3').data
+        Bill.objects.create(vendor=self.vendor, invoice_number='INV-NEW', bill_date=date(2026, 1, 27),
+                            subtotal=Decimal('10.00'), total_amount=Decimal('10.00'))
+        
+        second = self.client.get(f"/backup/sync?limit=3&page_token={first['next_page_token']}").data
+        
+        first_ids = {bill['id'] for bill in first['bills']}
+        self.assertFalse(first_ids & {bill['id'] for bill in second['bills']})
+        self.assertNotIn('INV-NEW', [bill['invoice_number'] for bill in second['bills']])
+        self.assertEqual(len(second['bills']), 3)
+    
+    def test_malformed_page_token(self):
+        """A page_token that doesn't decode is a 400"""
+        for page_token in ('not-a-token', base64.urlsafe_b64encode(b'a|b').decode(),
+                           base64.urlsafe_b64encode(b'\xff\xfe').decode()):
+            response = self.client.get('/backup/sync', {'page_token': page_token})
+            
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, {'error': 'Invalid page_token'})
+    
+    def test_stream_matches_regular_response(self):
+        """stream=1 produces the same JSON as the regular response, page token included"""
+        for params in ('limit=3', 'limit=100', 'billing_mode=non_gst'):
+            regular = self.client.get(f'/backup/sync?{params}')
+            streamed = self.client.get(f'/backup/sync?{params}&stream=1')
+            
+            self.assertEqual(streamed.status_code, status.HTTP_200_OK)
+            self.assertTrue(streamed.streaming)
+            self.assertEqual(json.loads(b''.join(streamed.streaming_content)), regular.json())
+
+
+class BillListTestCase(TestCase):
+    """Test GET /bills/ pagination totals"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testvendor', password='test123')
+        self.vendor = Vendor.objects.create(user=self.user, business_name='Test Restaurant', is_approved=True)
+        self.client.force_authenticate(self.user)
+        
+        # 5 cash bills with two items each, 1 UPI bill
+        for i in range(6):
+            bill = Bill.objects.create(vendor=self.vendor, invoice_number=f'INV-{i:03d}', bill_date=date(2026, 1, 27),
+                                       payment_mode='upi' if i == 5 else 'cash',
+                                       subtotal=Decimal('20.00'), total_amount=Decimal('20.00'))
+            for _ in range(2):
+                BillItem.objects.create(bill=bill, item_name='Tea', price=Decimal('10.00'), mrp_price=Decimal('10.00'),
+                                        quantity=Decimal('1.000'), subtotal=Decimal('10.00'))
+    
+    def test_total_on_a_page(self):
+        """total counts every matching bill (not item rows), read from the page query"""
+        with self.assertNumQueries(1):
+            response = self.client.get('/bills/', {'payment_mode': 'cash', 'limit': 2, 'offset': 2})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual([bill['item_count'] for bill in response.data['bills']], [2, 2])
+    
+    def test_total_past_the_end(self):
+        """An offset past the last bill returns no bills but still the real total"""
+        response = self.client.get('/bills/', {'payment_mode': 'cash', 'limit': 2, 'offset': 10})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(response.data['bills'], [])
+    
+    def test_total_without_matches(self):
+        """No matching bills at offset 0 gives a total of 0"""
+        response = self.client.get('/bills/', {'payment_mode': 'card'})
+        
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(response.data['total'], 0)
@@ -1,13 +1,14 @@
 """
 Utility functions for sales/billing operations
 """
-from django.db import transaction
+from django.db import connections, router
 from django.utils import timezone
 from decimal import Decimal
 
+from auth_app.models import Vendor
 
-@transaction.atomic
-def generate_bill_number(vendor):
+
+def generate_bill_number(vendor, *, now=None):
     """
     Generate sequential bill number in format: {prefix}-{date}-{number}
     
@@ -15,33 +16,79 @@ def generate_bill_number(vendor):
     - invoice_number: "INV-2026-01-27-0001" (full format with date)
     - bill_number: "INV-0001" (short format without date)
     
-    Thread-safe using database-level locking via @transaction.atomic
+    Thread-safe: the counter is incremented by a single UPDATE ... RETURNING.
+    Call it outside long transactions - in autocommit mode the vendor row is
+    locked only for that one statement, not for the rest of the request.
     
     Args:
         vendor: Vendor instance
+        now: Optional datetime for the date part (defaults to timezone.now())
         
     Returns:
         tuple: (invoice_number, bill_number)
+    
+    Raises:
+        Vendor.DoesNotExist: If the vendor row no longer exists
+    """
+    return generate_bill_numbers(vendor, 1, now=now)[0]
+
+
+def generate_bill_numbers(vendor, count, *, now=None):
     """
-    # Refresh vendor to get latest last_bill_number (prevents race conditions)
-    vendor.refresh_from_db()
+    Reserve `count` consecutive bill numbers for a vendor in one statement
     
-    # Get prefix (default to 'INV' if not set)
-    prefix = (vendor.bill_prefix or 'INV').strip().upper()
+    Same format and numbering as generate_bill_number, for callers that create
+    several bills at once (one vendor row update instead of one per bill).
     
-    # Get date in YYYY-MM-DD format
-    date_str = timezone.now().strftime('%Y-%m-%d')
+    Args:
+        vendor: Vendor instance
+        count: Number of bill numbers to reserve
+        now: Optional datetime for the date part (defaults to timezone.now());
+             pass one value to give every bill of a batch the same date
+        
+    Returns:
+        list: [(invoice_number, bill_number), ...] in ascending order
+    
+    Raises:
+        Vendor.DoesNotExist: If the vendor row no longer exists
+    """
+    if count <= 0:
+        return []
     
-    # Check if we need to initialize from starting_number
-    if vendor.last_bill_number == 0 and vendor.bill_starting_number > 0:
-        vendor.last_bill_number = vendor.bill_starting_number - 1
+    # Run on the database the vendor was loaded from
+    connection = connections[router.db_for_write(Vendor, instance=vendor)]
     
-    # Increment bill number atomically
-    vendor.last_bill_number += 1
-    vendor.save(update_fields=['last_bill_number'])
+    # Advance the counter and read it back in one statement. The UPDATE takes the
+    # vendor row lock, so concurrent requests get disjoint ranges; the CASE
+    # initializes from bill_starting_number on the first bill.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {connection.ops.quote_name(vendor._meta.db_table)}
+            SET last_bill_number = CASE
+                WHEN last_bill_number = 0 AND bill_starting_number > 0 THEN bill_starting_number - 1 + %s
+                ELSE last_bill_number + %s
+            END
+            WHERE id = %s
+            RETURNING last_bill_number, bill_prefix
+            """,
+            [count, count, vendor._meta.pk.get_db_prep_value(vendor.pk, connection)],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise Vendor.DoesNotExist(f"Vendor {vendor.pk} does not exist")
+    vendor.last_bill_number, vendor.bill_prefix = row
     
-    # Generate invoice_number and bill_number
-    invoice_number = f"{prefix}-{date_str}-{vendor.last_bill_number:04d}"
-    bill_number = f"{prefix}-{vendor.last_bill_number:04d}"
+    # Get prefix (default to 'INV' if not set)
+    prefix = (vendor.bill_prefix or 'INV').strip().upper()
+    
+    # Get date in YYYY-MM-DD format
+    date_str = (now or timezone.now()).strftime('%Y-%m-%d')
     
-    return invoice_number, bill_number
+    # Generate invoice_number and bill_number for each reserved number
+    # (the prefix/date part is the same for the whole range - build it once)
+    invoice_prefix = f"{prefix}-{date_str}-"
+    bill_prefix = f"{prefix}-"
+    first_number = vendor.last_bill_number - count + 1
+    numbers = ['%04d' % number for number in range(first_number, vendor.last_bill_number + 1)]
+    return [(invoice_prefix + number, bill_prefix + number) for number in numbers]
@@ -1,24 +1,131 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.permissions import IsAuthenticated
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Q
-from datetime import datetime, timedelta
+from django.db import transaction, DatabaseError, IntegrityError
+from django.db.models import Q, Count, Sum, Window
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from functools import lru_cache
+import base64
 import uuid
 
 from .models import Bill, BillItem, SalesBackup
 from .serializers import BillSerializer, BillListSerializer, BillItemSerializer, SalesBackupSerializer
 from .utils import generate_bill_number
 from .tax_utils import calculate_item_tax
-from auth_app.models import Vendor
+from .parsers import SyncJSONParser
+from backend.permissions import IsApprovedVendor
 from items.models import Item
 
+# How many invoice numbers POST /bills/ tries before giving up
+BILL_NUMBER_ATTEMPTS = 5
+
+# Shared zero for to_decimal (most optional amounts in mobile payloads are 0)
+DECIMAL_ZERO = Decimal('0')
+
+# Bills per lookup/INSERT batch in POST /backup/sync (small enough that a multi-row
+# INSERT is cheap - COPY only pays off for far larger loads)
+SYNC_BATCH_SIZE = 500
+
+
+def get_bill_queryset(vendor):
+    """
+    Helper to get a vendor's bills ready for BillSerializer
+    
+    Items are prefetched and item_count/total_quantity are annotated so
+    serializing a list of bills doesn't issue extra queries per bill. The
+    master item is serialized as its id (item_id column), so items__item
+    doesn't need to be joined.
+    """
+    return Bill.objects.filter(vendor=vendor).select_related('vendor').prefetch_related('items').annotate(
+        _item_count=Count('items'),
+        _total_quantity=Sum('items__quantity'),
+    )
+
+
+@lru_cache(maxsize=256)
+def parse_query_date(value):
+    """Helper to parse a YYYY-MM-DD query parameter (None if invalid) - list filters repeat the same few dates"""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_sync_date(value):
+    """Helper to parse a synced bill_date/expiry_date ('2024-01-22' or a full ISO timestamp) - rows in a batch share dates"""
+    return date.fromisoformat(value[:10])
+
+
+@lru_cache(maxsize=4096)
+def parse_sync_timestamp(value):
+    """Helper to parse a synced ISO timestamp ('Z' suffix allowed) - retried uploads resend the same ones"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def encode_sync_page_token(bill):
+    """Helper to build the GET /backup/sync page_token that continues after this bill"""
+    raw = f"{bill.synced_at.isoformat()}|{bill.created_at.isoformat()}|{bill.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_sync_page_token(page_token):
+    """Helper to read (synced_at, created_at, id) back from a page_token (ValueError if malformed)"""
+    raw = base64.urlsafe_b64decode(page_token.encode()).decode()
+    synced_at, created_at, bill_id = raw.split('|')
+    return datetime.fromisoformat(synced_at), datetime.fromisoformat(created_at), uuid.UUID(bill_id)
+
+
+def get_bill_date_filters(start_date, end_date):
+    """Helper to turn the optional start_date/end_date params into bill_date lookups (invalid dates are ignored)"""
+    filters = {}
+    start = parse_query_date(start_date) if start_date else None
+    if start:
+        filters['bill_date__gte'] = start
+    
+    end = parse_query_date(end_date) if end_date else None
+    if end:
+        filters['bill_date__lte'] = end
+    
+    return filters
+
+
+def to_decimal(value):
+    """
+    Helper to convert a JSON number/string to Decimal
+    
+    Zeros and Decimals are returned as is, ints and strings are converted directly;
+    only floats go through str() (so 0.1 becomes Decimal('0.1'), not the binary value).
+    """
+    if isinstance(value, Decimal):
+        return value
+    if value == 0 or value == '0':
+        return DECIMAL_ZERO
+    if type(value) in (int, str):  # Not bool - Decimal(True) would silently be 1
+        return Decimal(value)
+    return Decimal(str(value))
+
+
+def is_invoice_number_taken(errors):
+    """Helper to check if serializer errors are only the (vendor, invoice_number) unique check"""
+    non_field_errors = errors.get('non_field_errors', [])
+    return len(errors) == 1 and bool(non_field_errors) and all(e.code == 'unique' for e in non_field_errors)
+
+
 class SalesSyncView(APIView):
     """
     GET /backup/sync - Download bills from server (for new devices)
     POST /backup/sync - Upload bills to server (from mobile app)
     """
+    permission_classes = [IsAuthenticated, IsApprovedVendor]
+    # Offline uploads can be large - parse JSON with the faster parser when available
+    parser_classes = [SyncJSONParser, FormParser, MultiPartParser]
     
     def get(self, request):
         """
@@ -30,15 +137,14 @@ class SalesSyncView(APIView):
         - billing_mode: 'gst' or 'non_gst' (optional) - Filter by billing mode
         - start_date: YYYY-MM-DD (optional) - Filter by bill date
         - end_date: YYYY-MM-DD (optional) - Filter by bill date
-        """
-        vendor = Vendor.get_vendor_for_user(request.user)
-        if not vendor:
-            return Response({'error': 'Vendor profile not found'}, status=status.HTTP_403_FORBIDDEN)
+        - page_token: String (optional) - next_page_token from the previous page; continues
+          after its last bill (keyset pagination - stable while new bills are synced)
+        - stream: '1' (optional) - Stream the same JSON bill by bill instead of building it in
+          memory first (for large full syncs; 'count' then comes after 'bills')
         
-        if not vendor.is_approved or not request.user.is_active:
-            return Response({
-                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        Responses include next_page_token (null on the last page).
+        """
+        vendor = request.vendor
         
         # Get query parameters
         since = request.query_params.get('since')
@@ -47,47 +153,67 @@ class SalesSyncView(APIView):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         
-        # Base queryset
-        bills = Bill.objects.filter(vendor=vendor)
-        
-        # Apply filters
+        # Collect the filters and apply them in one .filter() call
+        filters = get_bill_date_filters(start_date, end_date)
         if since:
             try:
-                since_dt = datetime.fromisoformat(since.replace('Z', '+00:00'))
-                bills = bills.filter(synced_at__gte=since_dt)
+                filters['synced_at__gte'] = parse_sync_timestamp(since)
             except ValueError:
                 pass  # Invalid timestamp, ignore
         
         if billing_mode:
-            bills = bills.filter(billing_mode=billing_mode)
+            filters['billing_mode'] = billing_mode
         
-        if start_date:
-            try:
-                start = datetime.strptime(start_date, '%Y-%m-%d').date()
-                bills = bills.filter(bill_date__gte=start)
-            except ValueError:
-                pass
+        bills = get_bill_queryset(vendor).filter(**filters)
         
-        if end_date:
+        # Continue after the last bill of the previous page (same order as below, id breaks ties)
+        page_token = request.query_params.get('page_token')
+        if page_token:
             try:
-                end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                bills = bills.filter(bill_date__lte=end)
+                last_synced_at, last_created_at, last_id = decode_sync_page_token(page_token)
             except ValueError:
-                pass
+                return Response({'error': 'Invalid page_token'}, status=status.HTTP_400_BAD_REQUEST)
+            bills = bills.filter(
+                Q(synced_at__lt=last_synced_at)
+                | Q(synced_at=last_synced_at, created_at__lt=last_created_at)
+                | Q(synced_at=last_synced_at, created_at=last_created_at, id__lt=last_id)
+            )
+        
+        bills = bills.order_by('-synced_at', '-created_at', '-id')[:limit]
         
-        # Order and limit
-        bills = bills.order_by('-synced_at', '-created_at')[:limit]
+        if request.query_params.get('stream') == '1':
+            return StreamingHttpResponse(self._stream_bills(bills, vendor, limit), content_type='application/json')
+        
+        # Evaluate once - the count is the length of the page
+        bills = list(bills)
         
         # Serialize
         serializer = BillSerializer(bills, many=True)
         
         return Response({
-            'count': len(serializer.data),
+            'count': len(bills),
             'bills': serializer.data,
+            'next_page_token': encode_sync_page_token(bills[-1]) if bills and len(bills) == limit else None,
             'vendor_id': str(vendor.id),
             'vendor_name': vendor.business_name
         }, status=status.HTTP_200_OK)
     
+    def _stream_bills(self, bills, vendor, limit):
+        """
+        Yield the GET response JSON piece by piece, serializing bills in chunks
+        (peak memory stays at one chunk instead of the whole download)
+        """
+        renderer = JSONRenderer()
+        yield b'{"vendor_id":' + renderer.render(str(vendor.id)) + b',"vendor_name":' + renderer.render(vendor.business_name)
+        yield b',"bills":['
+        count = 0
+        bill = None
+        for bill in bills.iterator(chunk_size=100):
+            yield (b',' if count else b'') + renderer.render(BillSerializer(bill).data)
+            count += 1
+        next_page_token = encode_sync_page_token(bill) if bill and count == limit else None
+        yield b'],"count":' + renderer.render(count) + b',"next_page_token":' + (renderer.render(next_page_token) if next_page_token else b'null') + b'}'
+    
     def post(self, request):
         """
         POST /backup/sync - Upload bills from mobile app
@@ -96,6 +222,18 @@ class SalesSyncView(APIView):
         - Single bill object: { device_id, bill_data: {...} }
         - Array of bills: [{ device_id, bill_data: {...} }, ...]
         
+        Sync is synchronous and idempotent (already-synced invoice numbers are
+        returned, not re-created). Devices with a large offline backlog should
+        upload it as several requests of up to SYNC_BATCH_SIZE (500) bills rather
+        than one huge payload - each request then stays short, and a retry only
+        resends the failed chunk.
+        
+        Query Parameters:
+        - duplicates: 'full' (default) or 'brief' - with 'brief', already-synced bills are
+          returned as {id, invoice_number, status: 'already_synced'} instead of the full bill
+        - response: 'ack' (optional) - return every bill as {id, invoice_number, synced_at,
+          status: 'created' | 'already_synced'} instead of the full bill (no items)
+        
         bill_data structure:
         {
             "invoice_number": "INV-2024-001",
@@ -135,20 +273,110 @@ class SalesSyncView(APIView):
             "timestamp": "2024-01-22T10:00:00Z"
         }
         """
-        vendor = Vendor.get_vendor_for_user(request.user)
-        if not vendor:
-            return Response({'error': 'Vendor profile not found'}, status=status.HTTP_403_FORBIDDEN)
-        
-        if not vendor.is_approved or not request.user.is_active:
-            return Response({
-                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        vendor = request.vendor
         
         # Accept array of bills or single bill
         bills_data = request.data if isinstance(request.data, list) else [request.data]
         
-        created_bills = []
+        synced_bills = []  # Bills to return, in payload order (already synced and new)
+        synced_by_invoice = {}  # invoice_number -> Bill for the whole payload (catches repeats across batches)
         errors = []
+        created_pks = set()  # Bills actually inserted by this request (the rest were already synced)
+        
+        # Work through large offline uploads in fixed-size batches so the IN (...) lookup
+        # and the bulk INSERT of each batch stay bounded
+        for start in range(0, len(bills_data), SYNC_BATCH_SIZE):
+            batch_bills, batch_created = self._sync_batch(
+                vendor, bills_data[start:start + SYNC_BATCH_SIZE], synced_by_invoice, errors
+            )
+            synced_bills.extend(batch_bills)
+            created_pks.update(bill.pk for bill in batch_created)
+        
+        if request.query_params.get('response') == 'ack':
+            # ?response=ack: the client only reconciles ids - answer from the bills in hand,
+            # without re-reading and serializing them
+            created_bills = [
+                {
+                    'id': str(bill.pk),
+                    'invoice_number': bill.invoice_number,
+                    'synced_at': bill.synced_at,
+                    'status': 'created' if bill.pk in created_pks else 'already_synced',
+                }
+                for bill in synced_bills
+            ]
+        else:
+            created_bills = self._serialize_synced_bills(request, vendor, synced_bills, created_pks)
+        
+        response_data = {
+            'synced': len(created_bills),
+            'created': len(created_pks),
+            'bills': created_bills
+        }
+        
+        if errors:
+            response_data['errors'] = errors
+            # If no bills were created and there are errors, return 400
+            if len(created_bills) == 0:
+                return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(response_data, status=status.HTTP_201_CREATED)
+    
+    def _serialize_synced_bills(self, request, vendor, synced_bills, created_pks):
+        """Serialize the synced bills (in payload order) for the full POST response"""
+        # ?duplicates=brief: echo already-synced bills as a short stub instead of the full bill
+        brief_duplicates = request.query_params.get('duplicates') == 'brief'
+        
+        # Serialize everything from one prefetched/annotated query instead of re-querying items per bill
+        fetched = get_bill_queryset(vendor).in_bulk([
+            bill.pk for bill in synced_bills if not brief_duplicates or bill.pk in created_pks
+        ])
+        serialized = dict(zip(fetched, BillSerializer(fetched.values(), many=True).data))
+        created_bills = []
+        for bill in synced_bills:
+            if brief_duplicates and bill.pk not in created_pks:
+                created_bills.append({'id': str(bill.pk), 'invoice_number': bill.invoice_number, 'status': 'already_synced'})
+            elif bill.pk in serialized:
+                created_bills.append(serialized[bill.pk])
+        return created_bills
+    
+    def _sync_batch(self, vendor, bills_data, synced_by_invoice, errors):
+        """
+        Sync one batch of the POST payload: skip already-synced invoice numbers,
+        build the new bills and insert them together.
+        
+        Bills are built straight from bill_data (no serializer per bill); the
+        whole response is serialized once with BillSerializer(many=True).
+        
+        Returns (synced bills in payload order, newly inserted bills);
+        appends failures to errors.
+        """
+        # Look up every already-synced invoice number and linked master item in the batch
+        # with one query each
+        invoice_numbers = set()
+        item_ids = set()
+        for bill_request in bills_data:
+            bill_data = bill_request.get('bill_data', bill_request) if isinstance(bill_request, dict) else None
+            if not isinstance(bill_data, dict):
+                continue
+            if bill_data.get('invoice_number'):
+                invoice_numbers.add(bill_data['invoice_number'])
+            for item_data in bill_data.get('items') or []:
+                item_id = (item_data.get('item_id') or item_data.get('id')) if isinstance(item_data, dict) else None
+                if item_id:
+                    try:
+                        item_ids.add(uuid.UUID(str(item_id)))
+                    except ValueError:
+                        pass  # Reported with its bill below
+        invoice_numbers.difference_update(synced_by_invoice)
+        synced_by_invoice.update(
+            (bill.invoice_number, bill)
+            for bill in Bill.objects.filter(vendor=vendor, invoice_number__in=invoice_numbers)
+        )
+        items_by_id = Item.objects.filter(vendor=vendor).in_bulk(item_ids) if item_ids else {}
+        
+        synced_bills = []  # Bills to return, in payload order (already synced and new)
+        new_bills = []  # (bill, bill_items) built in memory, inserted together below
+        now = timezone.now()  # Fallback bill_date/created_at for bills that don't send one
         
         for bill_request in bills_data:
             try:
@@ -167,15 +395,11 @@ class SalesSyncView(APIView):
                     })
                     continue
                 
-                # Check if bill already exists (prevent duplicates)
-                existing_bill = Bill.objects.filter(
-                    vendor=vendor,
-                    invoice_number=invoice_number
-                ).first()
-                
+                # Check if bill already exists (prevent duplicates, also within this payload)
+                existing_bill = synced_by_invoice.get(invoice_number)
                 if existing_bill:
                     # Bill already exists, skip (already synced)
-                    created_bills.append(BillSerializer(existing_bill).data)
+                    synced_bills.append(existing_bill)
                     continue
                 
                 # Parse bill date
@@ -183,32 +407,32 @@ class SalesSyncView(APIView):
                 if bill_date_str:
                     try:
                         if isinstance(bill_date_str, str):
-                            bill_date = datetime.fromisoformat(bill_date_str.split('T')[0]).date()
+                            bill_date = parse_sync_date(bill_date_str)
                         else:
                             bill_date = bill_date_str
                     except:
-                        bill_date = timezone.now().date()
+                        bill_date = now.date()
                 else:
-                    bill_date = timezone.now().date()
+                    bill_date = now.date()
                 
                 # Parse created_at timestamp
                 created_at_str = bill_data.get('timestamp') or bill_data.get('created_at')
                 if created_at_str:
                     try:
                         if isinstance(created_at_str, str):
-                            created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
+                            created_at = parse_sync_timestamp(created_at_str)
                         else:
                             created_at = created_at_str
                     except:
-                        created_at = timezone.now()
+                        created_at = now
                 else:
-                    created_at = timezone.now()
+                    created_at = now
                 
-                # Create bill
-                bill = Bill.objects.create(
+                # Build bill (saved below together with the rest of the payload)
+                bill = Bill(
                     vendor=vendor,
-                    device_id=device_id,
                     invoice_number=invoice_number,
+                    device_id=device_id,
                     bill_number=bill_data.get('bill_number', ''),
                     bill_date=bill_date,
                     restaurant_name=bill_data.get('restaurant_name') or vendor.business_name,
@@ -222,17 +446,17 @@ class SalesSyncView(APIView):
                     customer_email=bill_data.get('customer_email'),
                     customer_address=bill_data.get('customer_address'),
                     billing_mode=bill_data.get('billing_mode', 'gst'),
-                    subtotal=Decimal(str(bill_data.get('subtotal', 0))),
-                    total_amount=Decimal(str(bill_data.get('total', bill_data.get('total_amount', 0)))),
-                    total_tax=Decimal(str(bill_data.get('total_tax', 0))),
-                    cgst_amount=Decimal(str(bill_data.get('cgst', 0))),
-                    sgst_amount=Decimal(str(bill_data.get('sgst', 0))),
-                    igst_amount=Decimal(str(bill_data.get('igst', 0))),
+                    subtotal=to_decimal(bill_data.get('subtotal', 0)),
+                    total_amount=to_decimal(bill_data.get('total', bill_data.get('total_amount', 0))),
+                    total_tax=to_decimal(bill_data.get('total_tax', 0)),
+                    cgst_amount=to_decimal(bill_data.get('cgst', 0)),
+                    sgst_amount=to_decimal(bill_data.get('sgst', 0)),
+                    igst_amount=to_decimal(bill_data.get('igst', 0)),
                     payment_mode=bill_data.get('payment_mode', 'cash'),
                     payment_reference=bill_data.get('payment_reference'),
-                    amount_paid=Decimal(str(bill_data.get('amount_paid', 0))) if bill_data.get('amount_paid') else None,
-                    change_amount=Decimal(str(bill_data.get('change_amount', 0))),
-                    discount_percentage=Decimal(str(bill_data.get('discount_percentage', 0))),
+                    amount_paid=to_decimal(bill_data.get('amount_paid', 0)) if bill_data.get('amount_paid') else None,
+                    change_amount=to_decimal(bill_data.get('change_amount', 0)),
+                    discount_percentage=to_decimal(bill_data.get('discount_percentage', 0)),
                     notes=bill_data.get('notes'),
                     table_number=bill_data.get('table_number'),
                     waiter_name=bill_data.get('waiter_name'),
@@ -241,6 +465,7 @@ class SalesSyncView(APIView):
                 
                 # Create bill items with HSN/SAC tax calculation
                 items_data = bill_data.get('items', [])
+                bill_items = []
                 vendor_sac_code = vendor.sac_code
                 vendor_sac_gst = vendor.sac_gst_percentage
                 
@@ -252,20 +477,25 @@ class SalesSyncView(APIView):
                     item_hsn_gst = None
                     
                     if item_id:
-                        try:
-                            item = Item.objects.get(id=item_id, vendor=vendor)
+                        item = items_by_id.get(uuid.UUID(str(item_id)))
+                        if item:
                             item_hsn_code = item.hsn_code
                             item_hsn_gst = item.hsn_gst_percentage
-                        except Item.DoesNotExist:
-                            pass
                     
                     # Use HSN from item_data if provided (for additional items)
                     if not item_hsn_code:
                         item_hsn_code = item_data.get('hsn_code')
                         item_hsn_gst = item_data.get('hsn_gst_percentage')
                     
+                    # Parse money/quantity fields once and reuse them below
+                    item_price = to_decimal(item_data.get('price', 0))
+                    item_quantity = to_decimal(item_data.get('quantity', 1))
+                    
                     # Calculate item subtotal
-                    item_subtotal = Decimal(str(item_data.get('subtotal', item_data.get('quantity', 1) * item_data.get('price', 0))))
+                    if 'subtotal' in item_data:
+                        item_subtotal = to_decimal(item_data['subtotal'])
+                    else:
+                        item_subtotal = item_quantity * item_price
                     
                     # Calculate tax for this item
                     item_tax, item_gst_percentage = calculate_item_tax(
@@ -276,16 +506,16 @@ class SalesSyncView(APIView):
                         sac_gst_percentage=vendor_sac_gst
                     )
                     
-                    BillItem.objects.create(
+                    bill_items.append(BillItem(
                         bill=bill,
                         item=item,
                         original_item_id=item_id,
                         item_name=item_data.get('name', 'Unknown Item'),
                         item_description=item_data.get('description'),
-                        price=Decimal(str(item_data.get('price', 0))),
-                        mrp_price=Decimal(str(item_data.get('mrp_price', item_data.get('price', 0)))),
+                        price=item_price,
+                        mrp_price=to_decimal(item_data['mrp_price']) if 'mrp_price' in item_data else item_price,
                         price_type=item_data.get('price_type', 'exclusive'),
-                        quantity=Decimal(str(item_data.get('quantity', 1))),
+                        quantity=item_quantity,
                         subtotal=item_subtotal,
                         hsn_code=item_hsn_code,
                         hsn_gst_percentage=item_hsn_gst,
@@ -295,29 +525,89 @@ class SalesSyncView(APIView):
                         # Item-level discounts removed - discounts are now bill-level percentage only
                         unit=item_data.get('unit'),
                         batch_number=item_data.get('batch_number'),
-                        expiry_date=datetime.fromisoformat(item_data.get('expiry_date')).date() if item_data.get('expiry_date') else None,
-                    )
+                        expiry_date=parse_sync_date(item_data['expiry_date']) if item_data.get('expiry_date') else None,
+                    ))
                 
-                created_bills.append(BillSerializer(bill).data)
+                new_bills.append((bill, bill_items))
+                synced_by_invoice[invoice_number] = bill
+                synced_bills.append(bill)
                 
             except Exception as e:
+                # Reject the malformed bill (never half-save it) and keep going with the batch
+                bill_data = bill_request.get('bill_data', bill_request) if isinstance(bill_request, dict) else None
                 errors.append({
-                    'bill_data': bill_request.get('bill_data', {}).get('invoice_number', 'Unknown'),
+                    'bill_data': bill_data.get('invoice_number', 'Unknown') if isinstance(bill_data, dict) else 'Unknown',
                     'error': str(e)
                 })
         
-        response_data = {
-            'synced': len(created_bills),
-            'bills': created_bills
-        }
-        
-        if errors:
-            response_data['errors'] = errors
-            # If no bills were created and there are errors, return 400
-            if len(created_bills) == 0:
-                return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+        replaced = {}
+        if new_bills:
+            replaced = self._save_new_bills(vendor, new_bills, errors)
+            if replaced:
+                synced_bills = [replaced.get(bill, bill) for bill in synced_bills]
+                synced_bills = [bill for bill in synced_bills if bill is not None]
+                for bill, stored_bill in replaced.items():
+                    synced_by_invoice[bill.invoice_number] = stored_bill
         
-        return Response(response_data, status=status.HTTP_201_CREATED)
+        return synced_bills, [bill for bill, _ in new_bills if bill not in replaced]
+    
+    def _save_new_bills(self, vendor, new_bills, errors):
+        """
+        Insert the new bills of a sync batch (and all their items) with bulk INSERTs.
+        
+        Bills whose invoice number a concurrent sync inserted first are skipped by
+        the INSERT (ON CONFLICT DO NOTHING on the vendor/invoice_number unique
+        constraint) and replaced by the stored bill. If the batch fails for any
+        other reason, fall back to saving bill by bill so only the offending bills
+        are affected. Returns {unsaved bill: stored bill or None} for the bills
+        that could not be inserted.
+        """
+        try:
+            with transaction.atomic():
+                Bill.objects.bulk_create([bill for bill, _ in new_bills], ignore_conflicts=True)
+                # ignore_conflicts doesn't report which rows went in - check the (client-side) primary keys
+                inserted = set(
+                    Bill.objects.filter(pk__in=[bill.pk for bill, _ in new_bills]).values_list('pk', flat=True)
+                )
+                BillItem.objects.bulk_create(
+                    [bill_item for bill, bill_items in new_bills if bill.pk in inserted for bill_item in bill_items],
+                    batch_size=1000
+                )
+            skipped = [bill for bill, _ in new_bills if bill.pk not in inserted]
+            if not skipped:
+                return {}
+            stored_bills = {
+                stored_bill.invoice_number: stored_bill
+                for stored_bill in Bill.objects.filter(
+                    vendor=vendor, invoice_number__in=[bill.invoice_number for bill in skipped]
+                )
+            }
+            replaced = {bill: stored_bills.get(bill.invoice_number) for bill in skipped}
+            for bill, stored_bill in replaced.items():
+                if stored_bill is None:
+                    errors.append({'bill_data': bill.invoice_number, 'error': 'Bill could not be saved'})
+            return replaced
+        except DatabaseError:
+            pass
+        
+        # One transaction for the whole fallback (one commit); each bill gets its own
+        # savepoint so a bad bill rolls back only itself
+        replaced = {}
+        with transaction.atomic():
+            for bill, bill_items in new_bills:
+                try:
+                    with transaction.atomic():
+                        bill.save(force_insert=True)
+                        BillItem.objects.bulk_create(bill_items)
+                except DatabaseError as e:
+                    # Already synced by a concurrent request - return the stored bill instead.
+                    # Any other database error means the bill itself is bad: report it, don't look it up.
+                    replaced[bill] = None
+                    if isinstance(e, IntegrityError):
+                        replaced[bill] = Bill.objects.filter(vendor=vendor, invoice_number=bill.invoice_number).first()
+                    if replaced[bill] is None:
+                        errors.append({'bill_data': bill.invoice_number, 'error': str(e)})
+        return replaced
 
 
 class BillListView(APIView):
@@ -325,6 +615,7 @@ class BillListView(APIView):
     GET /bills/ - List all bills for the vendor
     POST /bills/ - Create a new bill
     """
+    permission_classes = [IsAuthenticated, IsApprovedVendor]
     
     def get(self, request):
         """
@@ -338,14 +629,7 @@ class BillListView(APIView):
         - limit: Integer (optional, default=100) - Maximum number of bills to return
         - offset: Integer (optional, default=0) - Number of bills to skip (for pagination)
         """
-        vendor = Vendor.get_vendor_for_user(request.user)
-        if not vendor:
-            return Response({'error': 'Vendor profile not found'}, status=status.HTTP_403_FORBIDDEN)
-        
-        if not vendor.is_approved or not request.user.is_active:
-            return Response({
-                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        vendor = request.vendor
         
         # Get query parameters
         billing_mode = request.query_params.get('billing_mode')
@@ -355,41 +639,40 @@ class BillListView(APIView):
         limit = int(request.query_params.get('limit', 100))
         offset = int(request.query_params.get('offset', 0))
         
-        # Base queryset
-        bills = Bill.objects.filter(vendor=vendor)
-        
-        # Apply filters
+        # Collect the filters and apply them in one .filter() call
+        filters = get_bill_date_filters(start_date, end_date)
         if billing_mode:
-            bills = bills.filter(billing_mode=billing_mode)
-        
-        if start_date:
-            try:
-                start = datetime.strptime(start_date, '%Y-%m-%d').date()
-                bills = bills.filter(bill_date__gte=start)
-            except ValueError:
-                pass
-        
-        if end_date:
-            try:
-                end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                bills = bills.filter(bill_date__lte=end)
-            except ValueError:
-                pass
+            filters['billing_mode'] = billing_mode
         
         if payment_mode:
-            bills = bills.filter(payment_mode=payment_mode)
-        
-        # Get total count before pagination
-        total_count = bills.count()
-        
-        # Order and paginate
-        bills = bills.order_by('-created_at', '-bill_date')[offset:offset + limit]
+            filters['payment_mode'] = payment_mode
+        
+        bills = Bill.objects.filter(vendor=vendor, **filters)
+        
+        # Order and paginate, loading only the columns BillListSerializer returns.
+        # The total is read from the same query (COUNT(*) OVER ()) instead of a separate COUNT.
+        page = bills.select_related('vendor').only(
+            'id', 'invoice_number', 'bill_number', 'bill_date', 'billing_mode', 'total_amount',
+            'payment_mode', 'vendor__business_name', 'created_at', 'synced_at'
+        ).annotate(
+            _item_count=Count('items'),
+            _total_count=Window(expression=Count('*')),
+        ).order_by('-created_at', '-bill_date')[offset:offset + limit]
+        page = list(page)
+        
+        if page:
+            total_count = page[0]._total_count
+        elif offset:
+            total_count = bills.count()  # Paged past the end - no row to read the total from
+        else:
+            total_count = 0
+        bills = page
         
         # Serialize
         serializer = BillListSerializer(bills, many=True)
         
         return Response({
-            'count': len(serializer.data),
+            'count': len(bills),
             'total': total_count,
             'offset': offset,
             'limit': limit,
@@ -432,28 +715,17 @@ class BillListView(APIView):
             ...
         }
         """
-        vendor = Vendor.get_vendor_for_user(request.user)
-        if not vendor:
-            return Response({'error': 'Vendor profile not found'}, status=status.HTTP_403_FORBIDDEN)
-        
-        if not vendor.is_approved or not request.user.is_active:
-            return Response({
-                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        vendor = request.vendor
         
         # Get device_id from request (optional)
         device_id = request.data.get('device_id', '')
         
-        # Server always generates invoice number (client cannot provide it)
-        # This ensures sequential numbering across all devices
-        invoice_number, bill_number = generate_bill_number(vendor)
-        
         # Parse bill date
         bill_date_str = request.data.get('bill_date')
         if bill_date_str:
             try:
                 if isinstance(bill_date_str, str):
-                    bill_date = datetime.strptime(bill_date_str, '%Y-%m-%d').date()
+                    bill_date = date.fromisoformat(bill_date_str)
                 else:
                     bill_date = bill_date_str
             except:
@@ -463,27 +735,27 @@ class BillListView(APIView):
         
         # Calculate subtotal from items if not provided
         items_data = request.data.get('items_data', [])
-        calculated_subtotal = Decimal('0')
+        calculated_subtotal = DECIMAL_ZERO
         if items_data:
             for item in items_data:
                 # Get subtotal directly if provided, otherwise calculate from mrp_price and quantity
                 if 'subtotal' in item:
-                    item_subtotal = Decimal(str(item.get('subtotal', 0)))
+                    item_subtotal = to_decimal(item.get('subtotal', 0))
                 else:
-                    mrp_price = Decimal(str(item.get('mrp_price', 0)))
-                    quantity = Decimal(str(item.get('quantity', 1)))
+                    mrp_price = to_decimal(item.get('mrp_price', 0))
+                    quantity = to_decimal(item.get('quantity', 1))
                     item_subtotal = mrp_price * quantity
                 calculated_subtotal += item_subtotal
         
         # Use provided subtotal or calculated subtotal
-        subtotal = Decimal(str(request.data.get('subtotal', calculated_subtotal)))
+        subtotal = to_decimal(request.data.get('subtotal', calculated_subtotal))
         
         # Calculate taxes per item based on HSN/SAC
         billing_mode = request.data.get('billing_mode', 'gst')
-        cgst_amount = Decimal('0')
-        sgst_amount = Decimal('0')
-        igst_amount = Decimal('0')
-        total_tax = Decimal('0')
+        cgst_amount = DECIMAL_ZERO
+        sgst_amount = DECIMAL_ZERO
+        igst_amount = DECIMAL_ZERO
+        total_tax = DECIMAL_ZERO
         
         # Store item tax details for BillItem creation
         item_tax_details = []
@@ -515,10 +787,10 @@ class BillListView(APIView):
                 
                 # Calculate item subtotal
                 if 'subtotal' in item_data:
-                    item_subtotal = Decimal(str(item_data.get('subtotal', 0)))
+                    item_subtotal = to_decimal(item_data.get('subtotal', 0))
                 else:
-                    mrp_price = Decimal(str(item_data.get('mrp_price', 0)))
-                    quantity = Decimal(str(item_data.get('quantity', 1)))
+                    mrp_price = to_decimal(item_data.get('mrp_price', 0))
+                    quantity = to_decimal(item_data.get('quantity', 1))
                     item_subtotal = mrp_price * quantity
                 
                 # Calculate tax for this item
@@ -545,26 +817,26 @@ class BillListView(APIView):
             # TODO: Add logic to determine inter-state vs intra-state
             cgst_amount = (total_tax / 2).quantize(Decimal('0.01'))
             sgst_amount = (total_tax / 2).quantize(Decimal('0.01'))
-            igst_amount = Decimal('0')
+            igst_amount = DECIMAL_ZERO
             
             # Allow override if client provides tax values
             if request.data.get('cgst') or request.data.get('cgst_amount'):
-                cgst_amount = Decimal(str(request.data.get('cgst', request.data.get('cgst_amount', 0))))
+                cgst_amount = to_decimal(request.data.get('cgst', request.data.get('cgst_amount', 0)))
             if request.data.get('sgst') or request.data.get('sgst_amount'):
-                sgst_amount = Decimal(str(request.data.get('sgst', request.data.get('sgst_amount', 0))))
+                sgst_amount = to_decimal(request.data.get('sgst', request.data.get('sgst_amount', 0)))
             if request.data.get('igst') or request.data.get('igst_amount'):
-                igst_amount = Decimal(str(request.data.get('igst', request.data.get('igst_amount', 0))))
+                igst_amount = to_decimal(request.data.get('igst', request.data.get('igst_amount', 0)))
                 # If IGST is provided, CGST and SGST should be 0
                 if igst_amount > 0:
-                    cgst_amount = Decimal('0')
-                    sgst_amount = Decimal('0')
+                    cgst_amount = DECIMAL_ZERO
+                    sgst_amount = DECIMAL_ZERO
                     total_tax = igst_amount
         
         # Calculate discount percentage (primary field)
-        discount_percentage = Decimal(str(request.data.get('discount_percentage', 0)))
+        discount_percentage = to_decimal(request.data.get('discount_percentage', 0))
         
         # Calculate discount amount from percentage (applied to subtotal before tax)
-        discount_amount = Decimal('0')
+        discount_amount = DECIMAL_ZERO
         if discount_percentage > 0:
             discount_amount = (subtotal * discount_percentage / 100).quantize(Decimal('0.01'))
         
@@ -576,14 +848,12 @@ class BillListView(APIView):
         
         # Allow override if client provides total (for backward compatibility)
         if request.data.get('total') or request.data.get('total_amount'):
-            total_amount = Decimal(str(request.data.get('total', request.data.get('total_amount', total_amount))))
+            total_amount = to_decimal(request.data.get('total', request.data.get('total_amount', total_amount)))
         
         # Prepare bill data
         bill_data = {
             'vendor': vendor.id,  # Pass vendor UUID (DRF handles UUID objects)
             'device_id': device_id,
-            'invoice_number': invoice_number,
-            'bill_number': bill_number or '',
             'bill_date': bill_date,
             'restaurant_name': request.data.get('restaurant_name') or vendor.business_name,
             'address': request.data.get('address') or vendor.address,
@@ -604,8 +874,8 @@ class BillListView(APIView):
             'igst_amount': igst_amount,
             'payment_mode': request.data.get('payment_mode', 'cash'),
             'payment_reference': request.data.get('payment_reference'),
-            'amount_paid': Decimal(str(request.data.get('amount_paid', 0))) if request.data.get('amount_paid') else None,
-            'change_amount': Decimal(str(request.data.get('change_amount', 0))),
+            'amount_paid': to_decimal(request.data.get('amount_paid', 0)) if request.data.get('amount_paid') else None,
+            'change_amount': to_decimal(request.data.get('change_amount', 0)),
             'discount_percentage': discount_percentage,
             'notes': request.data.get('notes'),
             'table_number': request.data.get('table_number'),
@@ -624,15 +894,39 @@ class BillListView(APIView):
                 item_data_copy['item_gst'] = tax_detail['item_gst_amount']
             items_data_with_tax.append(item_data_copy)
         
-        # Use serializer to create bill with items
-        serializer = BillSerializer(data={**bill_data, 'items_data': items_data_with_tax})
-        
-        if serializer.is_valid():
-            # Vendor is in bill_data - serializer will handle it
-            bill = serializer.save()
-            return Response(BillSerializer(bill).data, status=status.HTTP_201_CREATED)
+        # Server always generates invoice number (client cannot provide it)
+        # This ensures sequential numbering across all devices. A number can already be
+        # taken (e.g. by a bill synced from a device), so skip ahead and retry.
+        now = timezone.now()
+        for attempt in range(BILL_NUMBER_ATTEMPTS):
+            invoice_number, bill_number = generate_bill_number(vendor, now=now)
+            
+            # Use serializer to create bill with items
+            serializer = BillSerializer(data={
+                **bill_data,
+                'invoice_number': invoice_number,
+                'bill_number': bill_number or '',
+                'items_data': items_data_with_tax,
+            })
+            
+            if not serializer.is_valid():
+                if is_invoice_number_taken(serializer.errors):
+                    continue
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                with transaction.atomic():
+                    # Vendor is in bill_data - serializer will handle it
+                    serializer.save()
+            except IntegrityError:
+                # Same invoice number inserted concurrently - take the next one
+                continue
+            # serializer.data renders the saved instance - no second serializer needed
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'error': 'Could not allocate a unique invoice number. Please try again.'
+        }, status=status.HTTP_409_CONFLICT)
 
 
 class BillDetailView(APIView):
@@ -641,20 +935,14 @@ class BillDetailView(APIView):
     PATCH /bills/<id>/ - Update bill (including items)
     DELETE /bills/<id>/ - Delete bill
     """
+    permission_classes = [IsAuthenticated, IsApprovedVendor]
     
     def get(self, request, bill_id):
         """GET /bills/<id>/ - Get bill details"""
-        vendor = Vendor.get_vendor_for_user(request.user)
-        if not vendor:
-            return Response({'error': 'Vendor profile not found'}, status=status.HTTP_403_FORBIDDEN)
-        
-        if not vendor.is_approved or not request.user.is_active:
-            return Response({
-                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        vendor = request.vendor
         
         try:
-            bill = Bill.objects.get(id=bill_id, vendor=vendor)
+            bill = get_bill_queryset(vendor).get(id=bill_id)
         except Bill.DoesNotExist:
             return Response({'error': 'Bill not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -690,14 +978,7 @@ class BillDetailView(APIView):
             ...
         }
         """
-        vendor = Vendor.get_vendor_for_user(request.user)
-        if not vendor:
-            return Response({'error': 'Vendor profile not found'}, status=status.HTTP_403_FORBIDDEN)
-        
-        if not vendor.is_approved or not request.user.is_active:
-            return Response({
-                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        vendor = request.vendor
         
         try:
             bill = Bill.objects.get(id=bill_id, vendor=vendor)
@@ -712,7 +993,7 @@ class BillDetailView(APIView):
             bill_date_str = request.data.get('bill_date')
             try:
                 if isinstance(bill_date_str, str):
-                    update_data['bill_date'] = datetime.strptime(bill_date_str, '%Y-%m-%d').date()
+                    update_data['bill_date'] = date.fromisoformat(bill_date_str)
                 else:
                     update_data['bill_date'] = bill_date_str
             except:
@@ -722,22 +1003,22 @@ class BillDetailView(APIView):
             update_data['billing_mode'] = request.data.get('billing_mode')
         
         if 'subtotal' in request.data:
-            update_data['subtotal'] = Decimal(str(request.data.get('subtotal')))
+            update_data['subtotal'] = to_decimal(request.data.get('subtotal'))
         
         if 'total_amount' in request.data or 'total' in request.data:
-            update_data['total_amount'] = Decimal(str(request.data.get('total', request.data.get('total_amount'))))
+            update_data['total_amount'] = to_decimal(request.data.get('total', request.data.get('total_amount')))
         
         if 'total_tax' in request.data:
-            update_data['total_tax'] = Decimal(str(request.data.get('total_tax')))
+            update_data['total_tax'] = to_decimal(request.data.get('total_tax'))
         
         if 'cgst_amount' in request.data or 'cgst' in request.data:
-            update_data['cgst_amount'] = Decimal(str(request.data.get('cgst', request.data.get('cgst_amount'))))
+            update_data['cgst_amount'] = to_decimal(request.data.get('cgst', request.data.get('cgst_amount')))
         
         if 'sgst_amount' in request.data or 'sgst' in request.data:
-            update_data['sgst_amount'] = Decimal(str(request.data.get('sgst', request.data.get('sgst_amount'))))
+            update_data['sgst_amount'] = to_decimal(request.data.get('sgst', request.data.get('sgst_amount')))
         
         if 'igst_amount' in request.data or 'igst' in request.data:
-            update_data['igst_amount'] = Decimal(str(request.data.get('igst', request.data.get('igst_amount'))))
+            update_data['igst_amount'] = to_decimal(request.data.get('igst', request.data.get('igst_amount')))
         
         if 'payment_mode' in request.data:
             update_data['payment_mode'] = request.data.get('payment_mode')
@@ -747,14 +1028,14 @@ class BillDetailView(APIView):
         
         if 'amount_paid' in request.data:
             amount_paid = request.data.get('amount_paid')
-            update_data['amount_paid'] = Decimal(str(amount_paid)) if amount_paid else None
+            update_data['amount_paid'] = to_decimal(amount_paid) if amount_paid else None
         
         if 'change_amount' in request.data:
-            update_data['change_amount'] = Decimal(str(request.data.get('change_amount')))
+            update_data['change_amount'] = to_decimal(request.data.get('change_amount'))
         
         # Update discount_percentage (primary field)
         if 'discount_percentage' in request.data:
-            discount_percentage = Decimal(str(request.data.get('discount_percentage')))
+            discount_percentage = to_decimal(request.data.get('discount_percentage'))
             update_data['discount_percentage'] = discount_percentage
         
         # Recalculate total_amount if discount_percentage, subtotal, or tax changed
@@ -767,7 +1048,7 @@ class BillDetailView(APIView):
             if discount_percentage > 0:
                 discount_amount = (subtotal * discount_percentage / 100).quantize(Decimal('0.01'))
             else:
-                discount_amount = Decimal('0')
+                discount_amount = DECIMAL_ZERO
             
             # Calculate discounted subtotal
             discounted_subtotal = subtotal - discount_amount
@@ -791,8 +1072,19 @@ class BillDetailView(APIView):
         serializer = BillSerializer(bill, data=serializer_data, partial=True)
         
         if serializer.is_valid():
-            updated_bill = serializer.save()
-            return Response(BillSerializer(updated_bill).data, status=status.HTTP_200_OK)
+            if 'items_data' in serializer.validated_data:
+                serializer.save()
+                # serializer.data renders the saved instance - no second serializer needed
+                return Response(serializer.data, status=status.HTTP_200_OK)
+            
+            # Header-only change (the common case): UPDATE just the sent columns instead of
+            # rewriting the whole row via save(), then render it from one prefetched query
+            validated_data = serializer.validated_data
+            validated_data.pop('vendor', None)
+            now = timezone.now()
+            Bill.objects.filter(pk=bill.pk).update(**validated_data, synced_at=now, updated_at=now)
+            bill = get_bill_queryset(vendor).get(pk=bill.pk)
+            return Response(BillSerializer(bill).data, status=status.HTTP_200_OK)
         
         # Log validation errors for debugging
         import logging
@@ -803,14 +1095,7 @@ class BillDetailView(APIView):
     
     def delete(self, request, bill_id):
         """DELETE /bills/<id>/ - Delete bill"""
-        vendor = Vendor.get_vendor_for_user(request.user)
-        if not vendor:
-            return Response({'error': 'Vendor profile not found'}, status=status.HTTP_403_FORBIDDEN)
-        
-        if not vendor.is_approved or not request.user.is_active:
-            return Response({
-                'error': 'Your vendor account is pending approval. Please wait for admin approval.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        vendor = request.vendor
         
         try:
             bill = Bill.objects.get(id=bill_id, vendor=vendor)
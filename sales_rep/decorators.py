@@ -0,0 +1,44 @@
+from functools import wraps
+from django.shortcuts import redirect
+from django.contrib import messages
+from django.http import JsonResponse
+from auth_app.models import SalesRep
+
+
+def sales_rep_required(view_func=None, *, api=False):
+    """
+    Restrict a view to active sales reps and staff (admin) users.
+
+    Page views redirect to the sales rep login with a message; api=True views
+    (approve/reject/... actions) answer with a 403 JSON error instead.
+    The sales rep profile is looked up once and kept on request.sales_rep
+    (None for staff users without one). Use below @login_required.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            try:
+                sales_rep = request.user.sales_rep_profile
+            except SalesRep.DoesNotExist:
+                sales_rep = None
+
+            if sales_rep is not None and not sales_rep.is_active:
+                if api:
+                    return JsonResponse({'error': 'Sales rep account not active'}, status=403)
+                messages.error(request, 'Your sales rep account is not active.')
+                return redirect('sales_rep:login')
+
+            # Not a sales rep - only staff (admin) users may continue
+            if sales_rep is None and not request.user.is_staff:
+                if api:
+                    return JsonResponse({'error': 'Access denied'}, status=403)
+                messages.error(request, 'Access denied. Sales rep access required.')
+                return redirect('sales_rep:login')
+
+            request.sales_rep = sales_rep
+            return view_func(request, *args, **kwargs)
+        return wrapper
+
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
@@ -1,3 +1,46 @@
 from django.test import TestCase
+from django.contrib.auth.models import User
+import uuid
 
-# Create your tests here.
+from auth_app.models import Vendor
+
+
+class BulkApproveTestCase(TestCase):
+    """Test bulk vendor approval from the sales rep vendor list"""
+    
+    def setUp(self):
+        # Staff users may use the sales rep views
+        self.staff = User.objects.create_user(username='staffuser', password='test123', is_staff=True)
+        self.client.force_login(self.staff)
+        
+        self.vendors = [
+            Vendor.objects.create(
+                user=User.objects.create_user(username=f'vendor{i}', password='test123'),
+                business_name=f'Restaurant {i}',
+                is_approved=False
+            )
+            for i in range(2)
+        ]
+    
+    def test_bulk_approve_reports_only_updated_vendors(self):
+        """Unknown and malformed ids are ignored and not echoed back as approved"""
+        posted_ids = [str(vendor.id) for vendor in self.vendors] + [str(uuid.uuid4()), 'not-a-uuid']
+        
+        response = self.client.post(
+            '/sales-rep/vendors/bulk-approve/',
+            {'vendor_ids': posted_ids},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(sorted(data['vendor_ids']), sorted(str(vendor.id) for vendor in self.vendors))
+        self.assertEqual(data['message'], '2 vendor(s) approved successfully')
+        self.assertEqual(Vendor.objects.filter(is_approved=True).count(), 2)
+    
+    def test_bulk_approve_without_selection(self):
+        """An empty selection is rejected"""
+        response = self.client.post('/sales-rep/vendors/bulk-approve/', {}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'No vendors selected')
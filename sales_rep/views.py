@@ -4,31 +4,59 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django.db.models import Q, Count
+import uuid
 from auth_app.models import Vendor, SalesRep
 from backend.audit_log import log_vendor_approval
+from .decorators import sales_rep_required
+
+# Vendor status counts shown on every vendor_list render change slowly - cache them briefly
+VENDOR_COUNTS_CACHE_KEY = 'sales_rep:vendor_status_counts'
+VENDOR_COUNTS_CACHE_TIMEOUT = 30  # seconds
+
+VENDORS_PER_PAGE = 50
+
+def is_valid_uuid(value):
+    """Helper to check that a posted vendor id is a UUID (anything else can't match a vendor)"""
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+def get_vendor_status_counts():
+    """Helper to get pending/approved/active/inactive vendor counts (one query, cached)"""
+    return cache.get_or_set(
+        VENDOR_COUNTS_CACHE_KEY,
+        lambda: Vendor.objects.aggregate(
+            pending_count=Count('id', filter=Q(is_approved=False)),
+            approved_count=Count('id', filter=Q(is_approved=True)),
+            active_count=Count('id', filter=Q(user__is_active=True)),
+            inactive_count=Count('id', filter=Q(user__is_active=False)),
+        ),
+        VENDOR_COUNTS_CACHE_TIMEOUT,
+    )
+
+def invalidate_vendor_status_counts():
+    """Helper to drop the cached vendor counts after an approval/activation change"""
+    cache.delete(VENDOR_COUNTS_CACHE_KEY)
 
 @login_required
+@sales_rep_required
 def vendor_list(request):
     """List all vendors with approval status"""
-    # Check if user is a sales rep
-    try:
-        sales_rep = request.user.sales_rep_profile
-        if not sales_rep.is_active:
-            messages.error(request, 'Your sales rep account is not active.')
-            return redirect('sales_rep:login')
-    except SalesRep.DoesNotExist:
-        # Check if user is staff (admin)
-        if not request.user.is_staff:
-            messages.error(request, 'Access denied. Sales rep access required.')
-            return redirect('sales_rep:login')
-    
     # Get filter parameters
     status_filter = request.GET.get('status', 'all')  # all, pending, approved, active, inactive
     search_query = request.GET.get('search', '')
     
-    # Get vendors
-    vendors = Vendor.objects.all().select_related('user')
+    # Get vendors (only the columns the list shows)
+    vendors = Vendor.objects.all().select_related('user').only(
+        'id', 'business_name', 'phone', 'is_approved', 'created_at',
+        'user__username', 'user__email', 'user__is_active',
+    )
     
     # Apply filters
     if status_filter == 'pending':
@@ -51,36 +79,30 @@ def vendor_list(request):
     # Order by creation date (newest first)
     vendors = vendors.order_by('-created_at')
     
+    # Render one page at a time
+    page_obj = Paginator(vendors, VENDORS_PER_PAGE).get_page(request.GET.get('page'))
+    
     context = {
-        'vendors': vendors,
+        'vendors': page_obj,
+        'page_obj': page_obj,
         'status_filter': status_filter,
         'search_query': search_query,
-        'pending_count': Vendor.objects.filter(is_approved=False).count(),
-        'approved_count': Vendor.objects.filter(is_approved=True).count(),
-        'active_count': Vendor.objects.filter(user__is_active=True).count(),
-        'inactive_count': Vendor.objects.filter(user__is_active=False).count(),
+        **get_vendor_status_counts(),
     }
     
     return render(request, 'sales_rep/vendor_list.html', context)
 
 @login_required
 @require_http_methods(["POST"])
+@sales_rep_required(api=True)
 def approve_vendor(request, vendor_id):
     """Approve a vendor (approval status only)"""
-    # Check if user is a sales rep
-    try:
-        sales_rep = request.user.sales_rep_profile
-        if not sales_rep.is_active:
-            return JsonResponse({'error': 'Sales rep account not active'}, status=403)
-    except SalesRep.DoesNotExist:
-        if not request.user.is_staff:
-            return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    vendor = get_object_or_404(Vendor, id=vendor_id)
+    vendor = get_object_or_404(Vendor.objects.select_related('user'), id=vendor_id)
     
     # Approve vendor (only approval status, not activation)
     vendor.is_approved = True
-    vendor.save()
+    vendor.save(update_fields=['is_approved', 'updated_at'])
+    invalidate_vendor_status_counts()
     
     # Log audit event
     log_vendor_approval(vendor, request.user, action='approved')
@@ -88,7 +110,10 @@ def approve_vendor(request, vendor_id):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
-            'message': f'Vendor {vendor.business_name or vendor.user.username} approved successfully'
+            'message': f'Vendor {vendor.business_name or vendor.user.username} approved successfully',
+            # New state, so the list page can update the row in place instead of reloading
+            'vendor_id': str(vendor.id),
+            'is_approved': True,
         })
     
     messages.success(request, f'Vendor {vendor.business_name or vendor.user.username} approved successfully')
@@ -96,22 +121,15 @@ def approve_vendor(request, vendor_id):
 
 @login_required
 @require_http_methods(["POST"])
+@sales_rep_required(api=True)
 def reject_vendor(request, vendor_id):
     """Reject a vendor (approval status only)"""
-    # Check if user is a sales rep
-    try:
-        sales_rep = request.user.sales_rep_profile
-        if not sales_rep.is_active:
-            return JsonResponse({'error': 'Sales rep account not active'}, status=403)
-    except SalesRep.DoesNotExist:
-        if not request.user.is_staff:
-            return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    vendor = get_object_or_404(Vendor, id=vendor_id)
+    vendor = get_object_or_404(Vendor.objects.select_related('user'), id=vendor_id)
     
     # Reject vendor (only approval status, not activation)
     vendor.is_approved = False
-    vendor.save()
+    vendor.save(update_fields=['is_approved', 'updated_at'])
+    invalidate_vendor_status_counts()
     
     # Log audit event
     log_vendor_approval(vendor, request.user, action='rejected')
@@ -119,7 +137,10 @@ def reject_vendor(request, vendor_id):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
-            'message': f'Vendor {vendor.business_name or vendor.user.username} rejected'
+            'message': f'Vendor {vendor.business_name or vendor.user.username} rejected',
+            # New state, so the list page can update the row in place instead of reloading
+            'vendor_id': str(vendor.id),
+            'is_approved': False,
         })
     
     messages.success(request, f'Vendor {vendor.business_name or vendor.user.username} rejected')
@@ -127,22 +148,15 @@ def reject_vendor(request, vendor_id):
 
 @login_required
 @require_http_methods(["POST"])
+@sales_rep_required(api=True)
 def activate_vendor(request, vendor_id):
     """Activate a vendor (active status only)"""
-    # Check if user is a sales rep
-    try:
-        sales_rep = request.user.sales_rep_profile
-        if not sales_rep.is_active:
-            return JsonResponse({'error': 'Sales rep account not active'}, status=403)
-    except SalesRep.DoesNotExist:
-        if not request.user.is_staff:
-            return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    vendor = get_object_or_404(Vendor, id=vendor_id)
+    vendor = get_object_or_404(Vendor.objects.select_related('user'), id=vendor_id)
     
     # Activate vendor (only active status)
     vendor.user.is_active = True
-    vendor.user.save()
+    vendor.user.save(update_fields=['is_active'])
+    invalidate_vendor_status_counts()
     
     # Log audit event
     log_vendor_approval(vendor, request.user, action='activated')
@@ -150,7 +164,10 @@ def activate_vendor(request, vendor_id):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
-            'message': f'Vendor {vendor.business_name or vendor.user.username} activated successfully'
+            'message': f'Vendor {vendor.business_name or vendor.user.username} activated successfully',
+            # New state, so the list page can update the row in place instead of reloading
+            'vendor_id': str(vendor.id),
+            'is_active': True,
         })
     
     messages.success(request, f'Vendor {vendor.business_name or vendor.user.username} activated successfully')
@@ -158,22 +175,15 @@ def activate_vendor(request, vendor_id):
 
 @login_required
 @require_http_methods(["POST"])
+@sales_rep_required(api=True)
 def deactivate_vendor(request, vendor_id):
     """Deactivate a vendor (active status only)"""
-    # Check if user is a sales rep
-    try:
-        sales_rep = request.user.sales_rep_profile
-        if not sales_rep.is_active:
-            return JsonResponse({'error': 'Sales rep account not active'}, status=403)
-    except SalesRep.DoesNotExist:
-        if not request.user.is_staff:
-            return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    vendor = get_object_or_404(Vendor, id=vendor_id)
+    vendor = get_object_or_404(Vendor.objects.select_related('user'), id=vendor_id)
     
     # Deactivate vendor (only active status)
     vendor.user.is_active = False
-    vendor.user.save()
+    vendor.user.save(update_fields=['is_active'])
+    invalidate_vendor_status_counts()
     
     # Log audit event
     log_vendor_approval(vendor, request.user, action='deactivated')
@@ -181,7 +191,10 @@ def deactivate_vendor(request, vendor_id):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
-            'message': f'Vendor {vendor.business_name or vendor.user.username} deactivated'
+            'message': f'Vendor {vendor.business_name or vendor.user.username} deactivated',
+            # New state, so the list page can update the row in place instead of reloading
+            'vendor_id': str(vendor.id),
+            'is_active': False,
         })
     
     messages.success(request, f'Vendor {vendor.business_name or vendor.user.username} deactivated')
@@ -189,28 +202,32 @@ def deactivate_vendor(request, vendor_id):
 
 @login_required
 @require_http_methods(["POST"])
+@sales_rep_required(api=True)
 def bulk_approve(request):
     """Bulk approve multiple vendors"""
-    # Check if user is a sales rep
-    try:
-        sales_rep = request.user.sales_rep_profile
-        if not sales_rep.is_active:
-            return JsonResponse({'error': 'Sales rep account not active'}, status=403)
-    except SalesRep.DoesNotExist:
-        if not request.user.is_staff:
-            return JsonResponse({'error': 'Access denied'}, status=403)
-    
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
     vendor_ids = request.POST.getlist('vendor_ids')
     if not vendor_ids:
+        if is_ajax:
+            return JsonResponse({'error': 'No vendors selected'}, status=400)
         messages.error(request, 'No vendors selected')
         return redirect('sales_rep:vendor_list')
     
-    vendors = Vendor.objects.filter(id__in=vendor_ids)
-    count = 0
-    for vendor in vendors:
-        vendor.is_approved = True
-        vendor.save()
-        count += 1
+    # Only vendors that exist are approved - report those back, not the posted ids
+    vendor_ids = [vendor_id for vendor_id in vendor_ids if is_valid_uuid(vendor_id)]
+    approved_ids = [str(vendor_id) for vendor_id in Vendor.objects.filter(id__in=vendor_ids).values_list('id', flat=True)]
+    
+    # One UPDATE for all selected vendors (approval status only, like approve_vendor);
+    # updated_at is set explicitly since auto_now only applies on save()
+    count = Vendor.objects.filter(id__in=approved_ids).update(is_approved=True, updated_at=timezone.now())
+    invalidate_vendor_status_counts()
+    
+    if is_ajax:
+        return JsonResponse({
+            'success': True,
+            'message': f'{count} vendor(s) approved successfully',
+            'vendor_ids': approved_ids,
+        })
     
     messages.success(request, f'{count} vendor(s) approved successfully')
     return redirect('sales_rep:vendor_list')
@@ -247,19 +264,9 @@ def login_view(request):
     return render(request, 'sales_rep/login.html')
 
 @login_required
+@sales_rep_required
 def vendor_detail(request, vendor_id):
     """View vendor details"""
-    # Check if user is a sales rep
-    try:
-        sales_rep = request.user.sales_rep_profile
-        if not sales_rep.is_active:
-            messages.error(request, 'Your sales rep account is not active.')
-            return redirect('sales_rep:login')
-    except SalesRep.DoesNotExist:
-        if not request.user.is_staff:
-            messages.error(request, 'Access denied.')
-            return redirect('sales_rep:login')
-    
     vendor = get_object_or_404(Vendor, id=vendor_id)
     
     context = {
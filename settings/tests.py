@@ -1,3 +1,67 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
 
-# Create your tests here.
+from auth_app.models import Vendor
+from settings.models import AppSettings
+
+
+class SettingsPushTestCase(TestCase):
+    """Test POST /settings/push"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testvendor', password='test123')
+        self.vendor = Vendor.objects.create(user=self.user, business_name='Test Restaurant', is_approved=True)
+        self.client.force_authenticate(self.user)
+    
+    def push(self, settings_data):
+        """Helper to push settings for the test device and capture the queries"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/settings/push', {'device_id': 'device-1', 'settings_data': settings_data},
+                                        format='json')
+        settings_queries = [query['sql'] for query in ctx.captured_queries if '"settings_appsettings"' in query['sql']]
+        return response, settings_queries
+    
+    def test_first_push_creates(self):
+        """The first push from a device creates its settings"""
+        response, _ = self.push({'theme': 'dark'})
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['settings_data'], {'theme': 'dark'})
+        self.assertEqual(response.data['vendor_name'], 'Test Restaurant')
+    
+    def test_unchanged_push_writes_nothing(self):
+        """Re-pushing the same settings reads them once and doesn't update the row"""
+        self.push({'theme': 'dark'})
+        last_updated = AppSettings.objects.get().last_updated
+        
+        response, queries = self.push({'theme': 'dark'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith('SELECT'))
+        self.assertEqual(AppSettings.objects.get().last_updated, last_updated)
+    
+    def test_changed_push_updates_with_one_fetch(self):
+        """A changed push is one SELECT plus one UPDATE of the changed columns"""
+        self.push({'theme': 'dark'})
+        
+        response, queries = self.push({'theme': 'light'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['settings_data'], {'theme': 'light'})
+        self.assertEqual(response.data['vendor_name'], 'Test Restaurant')
+        self.assertEqual([query.split()[0] for query in queries], ['SELECT', 'UPDATE'])
+        self.assertNotIn('"device_id" =', queries[1].split('WHERE')[0])
+        self.assertEqual(AppSettings.objects.get().settings_data, {'theme': 'light'})
+    
+    def test_missing_device_id(self):
+        """device_id is required"""
+        response = self.client.post('/settings/push', {'settings_data': {}}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'device_id required'})
@@ -1,6 +1,7 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.db import transaction
 from .models import AppSettings
 from .serializers import AppSettingsSerializer
 from auth_app.models import Vendor
@@ -25,13 +26,27 @@ class SettingsPushView(APIView):
         if not device_id:
             return Response({'error': 'device_id required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update or create (Last-Write-Wins) - vendor-specific
-        settings, created = AppSettings.objects.update_or_create(
-            vendor=vendor,
-            device_id=device_id,
-            defaults={'settings_data': settings_data}
-        )
+        with transaction.atomic():
+            # Lock and compare in the same fetch - devices re-push the same settings on every
+            # heartbeat, and then there is nothing to write (last_updated stays at the last real change)
+            try:
+                settings = AppSettings.objects.select_for_update().get(vendor=vendor, device_id=device_id)
+            except AppSettings.DoesNotExist:
+                # First push from this device (update_or_create handles a concurrent first push)
+                settings, created = AppSettings.objects.update_or_create(
+                    vendor=vendor,
+                    device_id=device_id,
+                    defaults={'settings_data': settings_data}
+                )
+            else:
+                created = False
+                if settings.settings_data != settings_data:
+                    # Update (Last-Write-Wins) - vendor-specific
+                    settings.settings_data = settings_data
+                    settings.save(update_fields=['settings_data', 'last_updated'])
         
+        # The serializer reads vendor_name - use the vendor already loaded instead of a join
+        settings.vendor = vendor
         serializer = AppSettingsSerializer(settings)
         return Response(serializer.data, 
                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
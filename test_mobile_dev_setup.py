@@ -4,10 +4,14 @@ Comprehensive test script to verify all mobile developer setup
 Tests all endpoints, data, images, and URLs
 """
 import os
+import re
 import sys
 import django
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 import uuid
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
@@ -16,6 +20,7 @@ django.setup()
 from django.contrib.auth.models import User
 from django.test import Client
 from django.conf import settings
+from django.db.models import Count, Q
 from items.models import Item, Category
 from auth_app.models import Vendor
 from sales.models import SalesBackup
@@ -26,6 +31,21 @@ BASE_URL = "http://localhost:8000"
 USERNAME = "mobiledev"
 PASSWORD = "mobile123"
 
+# Shared sessions - keep-alive connections are reused across all requests
+# (api_request sends the auth token per request, never as a session header;
+# image checks use their own session for the S3/https hosts)
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+IMAGE_SESSION = requests.Session()
+IMAGE_SESSION.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+IMAGE_SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+# Image URLs are checked concurrently (each check mostly waits on S3)
+IMAGE_CHECK_WORKERS = 16
+
+# S3 pre-signed URLs carry the signature in the query string
+PRESIGNED_URL_RE = re.compile(r'[?&]X-Amz-(?:Algorithm|Expires)=')
+
 class Colors:
     GREEN = '\033[92m'
     RED = '\033[91m'
@@ -51,116 +71,121 @@ def print_header(msg):
     print(f"{Colors.BOLD}{Colors.BLUE}{msg}{Colors.END}")
     print(f"{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}\n")
 
+def is_presigned_url(url):
+    """Check if an image URL is an S3 pre-signed URL"""
+    return bool(url) and PRESIGNED_URL_RE.search(url) is not None
+
+def check_image_url(img_url, timeout=10):
+    """Request an image URL and return the HTTP status code"""
+    if is_presigned_url(img_url):
+        # Pre-signed URL - use GET (signed for GET), only check status, don't download the image
+        img_response = IMAGE_SESSION.get(img_url, timeout=timeout, allow_redirects=True, stream=True)
+        img_response.close()
+        return img_response.status_code
+    # Direct URL - try HEAD first, fallback to GET
+    try:
+        return IMAGE_SESSION.head(img_url, timeout=timeout, allow_redirects=True).status_code
+    except requests.RequestException:
+        img_response = IMAGE_SESSION.get(img_url, timeout=timeout, allow_redirects=True, stream=True)
+        img_response.close()
+        return img_response.status_code
+
+def check_item_images(items, timeout=10):
+    """Check the image URLs of items with an image in parallel - returns [(item, status_code, error)]"""
+    def check(item):
+        try:
+            return item, check_image_url(item['image_url'], timeout), None
+        except Exception as e:
+            return item, None, e
+    
+    with ThreadPoolExecutor(max_workers=IMAGE_CHECK_WORKERS) as executor:
+        return list(executor.map(check, [item for item in items if item.get('image_url')]))
+
+def api_request(method, path, token=None, json=None, timeout=10):
+    """
+    Call an API endpoint over HTTP, falling back to the Django test client when
+    the HTTP request fails. Either response has .status_code, .json() and .content.
+    """
+    headers = {"Authorization": f"Token {token}"} if token else None
+    try:
+        return SESSION.request(method, f"{BASE_URL}{path}", json=json, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        kwargs = {}
+        if token:
+            kwargs['HTTP_AUTHORIZATION'] = f'Token {token}'
+        if json is not None:
+            kwargs.update(data=json, content_type='application/json')
+        return getattr(Client(), method.lower())(path, **kwargs)
+
+def response_source(response):
+    """Where a response came from - 'HTTP' or 'Test Client'"""
+    return 'HTTP' if isinstance(response, requests.Response) else 'Test Client'
+
+def get_results(response):
+    """List of results from a (possibly paginated) list response"""
+    data = response.json()
+    return data.get('results', []) if isinstance(data, dict) else data
+
+@lru_cache(maxsize=1)
+def fetch_items(token):
+    """GET /items/ once - the item tests share this response instead of refetching the list"""
+    return api_request('GET', '/items/', token)
+
 def test_health_check():
     """Test health check endpoint"""
     print_header("1. HEALTH CHECK")
     try:
-        # Try HTTP first
-        try:
-            response = requests.get(f"{BASE_URL}/health/", timeout=5)
-            if response.status_code == 200:
-                print_success(f"Health check (HTTP): {response.status_code}")
-                data = response.json()
-                print_info(f"Server: {data.get('server', 'unknown')}")
-                print_info(f"Database: {data.get('database', 'unknown')}")
-                return True
-        except:
-            # Fallback to Django test client
-            client = Client()
-            response = client.get('/health/')
-            if response.status_code == 200:
-                print_success(f"Health check (Test Client): {response.status_code}")
-                data = response.json()
-                print_info(f"Server: {data.get('server', 'unknown')}")
-                print_info(f"Database: {data.get('database', 'unknown')}")
-                return True
-            else:
-                print_error(f"Health check failed: {response.status_code}")
-                return False
+        response = api_request('GET', '/health/', timeout=5)
+        if response.status_code == 200:
+            print_success(f"Health check ({response_source(response)}): {response.status_code}")
+            data = response.json()
+            print_info(f"Server: {data.get('server', 'unknown')}")
+            print_info(f"Database: {data.get('database', 'unknown')}")
+            return True
+        else:
+            print_error(f"Health check failed: {response.status_code}")
+            return False
     except Exception as e:
         print_error(f"Health check error: {e}")
         return False
 
 def test_login():
-    """Test login endpoint"""
+    """Test login endpoint - returns (token, vendor data)"""
     print_header("2. LOGIN ENDPOINT")
     try:
-        # Try HTTP first
-        try:
-            response = requests.post(
-                f"{BASE_URL}/auth/login",
-                json={"username": USERNAME, "password": PASSWORD},
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                token = data.get('token')
-                vendor = data.get('vendor', {})
-                
-                print_success(f"Login successful (HTTP): {response.status_code}")
-                print_info(f"Token: {token[:20]}...")
-                print_info(f"Username: {data.get('username')}")
-                print_info(f"Business: {vendor.get('business_name')}")
-                print_info(f"GST: {vendor.get('gst_no')}")
-                print_info(f"FSSAI: {vendor.get('fssai_license')}")
-                print_info(f"Logo URL: {vendor.get('logo_url', 'None')[:60]}...")
-                print_info(f"Footer Note: {vendor.get('footer_note', 'None')[:50]}...")
-                
-                return token
-        except:
-            # Fallback to Django test client
-            client = Client()
-            response = client.post(
-                '/auth/login',
-                data={"username": USERNAME, "password": PASSWORD},
-                content_type='application/json'
-            )
-            if response.status_code == 200:
-                data = response.json()
-                token = data.get('token')
-                vendor = data.get('vendor', {})
-                
-                print_success(f"Login successful (Test Client): {response.status_code}")
-                print_info(f"Token: {token[:20]}...")
-                print_info(f"Username: {data.get('username')}")
-                print_info(f"Business: {vendor.get('business_name')}")
-                print_info(f"GST: {vendor.get('gst_no')}")
-                print_info(f"FSSAI: {vendor.get('fssai_license')}")
-                print_info(f"Logo URL: {vendor.get('logo_url', 'None')[:60]}...")
-                print_info(f"Footer Note: {vendor.get('footer_note', 'None')[:50]}...")
-                
-                return token
-            else:
-                print_error(f"Login failed: {response.status_code}")
-                print_error(f"Response: {response.content.decode()[:200]}")
-                return None
+        response = api_request('POST', '/auth/login', json={"username": USERNAME, "password": PASSWORD})
+        if response.status_code == 200:
+            data = response.json()
+            token = data.get('token')
+            vendor = data.get('vendor', {})
+            
+            print_success(f"Login successful ({response_source(response)}): {response.status_code}")
+            print_info(f"Token: {token[:20]}...")
+            print_info(f"Username: {data.get('username')}")
+            print_info(f"Business: {vendor.get('business_name')}")
+            print_info(f"GST: {vendor.get('gst_no')}")
+            print_info(f"FSSAI: {vendor.get('fssai_license')}")
+            print_info(f"Logo URL: {vendor.get('logo_url', 'None')[:60]}...")
+            print_info(f"Footer Note: {vendor.get('footer_note', 'None')[:50]}...")
+            
+            return token, vendor
+        else:
+            print_error(f"Login failed: {response.status_code}")
+            print_error(f"Response: {response.content.decode()[:200]}")
+            return None, None
     except Exception as e:
         print_error(f"Login error: {e}")
         import traceback
         traceback.print_exc()
-        return None
+        return None, None
 
 def test_get_items(token):
     """Test get all items endpoint"""
     print_header("3. GET ALL ITEMS")
     try:
-        # Try HTTP first
-        try:
-            response = requests.get(
-                f"{BASE_URL}/items/",
-                headers={"Authorization": f"Token {token}"},
-                timeout=10
-            )
-        except:
-            # Fallback to Django test client
-            client = Client()
-            response = client.get(
-                '/items/',
-                HTTP_AUTHORIZATION=f'Token {token}'
-            )
+        response = fetch_items(token)
         if response.status_code == 200:
-            data = response.json()
-            items = data.get('results', []) if isinstance(data, dict) else data
+            items = get_results(response)
             
             print_success(f"Items fetched: {response.status_code}")
             print_info(f"Total items: {len(items)}")
@@ -170,36 +195,21 @@ def test_get_items(token):
             items_with_images = 0
             items_with_all_fields = 0
             
+            # Test image URLs of the first 5 items (in parallel)
+            for item, status_code, img_err in check_item_images(items[:5], timeout=5):
+                items_with_images += 1
+                if img_err is not None:
+                    print_warning(f"  Could not verify image: {item.get('name')} ({str(img_err)[:30]})")
+                elif status_code == 200:
+                    print_success(f"  Image accessible: {item.get('name')}")
+                else:
+                    print_warning(f"  Image not accessible: {item.get('name')} ({status_code})")
+            
             for item in items[:5]:  # Check first 5
-                has_image = bool(item.get('image_url'))
-                if has_image:
-                    items_with_images += 1
-                    # Test image URL
-                    img_url = item.get('image_url')
-                    if img_url:
-                        try:
-                            # Check if pre-signed URL (has query params)
-                            is_presigned = '?' in img_url and ('X-Amz-Algorithm' in img_url or 'X-Amz-Expires' in img_url)
-                            if is_presigned:
-                                # Pre-signed URL - use GET
-                                img_response = requests.get(img_url, timeout=5, stream=True)
-                                img_response.close()
-                            else:
-                                # Direct URL - use HEAD
-                                img_response = requests.head(img_url, timeout=5)
-                            
-                            if img_response.status_code == 200:
-                                print_success(f"  Image accessible: {item.get('name')}")
-                            else:
-                                print_warning(f"  Image not accessible: {item.get('name')} ({img_response.status_code})")
-                        except Exception as img_err:
-                            print_warning(f"  Could not verify image: {item.get('name')} ({str(img_err)[:30]})")
-                
-                has_all = all(item.get(field) is not None for field in required_fields)
-                if has_all:
+                missing = [f for f in required_fields if item.get(f) is None]
+                if not missing:
                     items_with_all_fields += 1
                 else:
-                    missing = [f for f in required_fields if item.get(f) is None]
                     print_warning(f"  {item.get('name')} missing: {', '.join(missing)}")
             
             print_info(f"Items with images: {items_with_images}/5 checked")
@@ -217,9 +227,8 @@ def test_get_items(token):
                 img_url = sample.get('image_url', 'None')
                 if img_url and img_url != 'None':
                     # Show if it's pre-signed (has query params)
-                    is_presigned = '?' in img_url and ('X-Amz' in img_url or 'X-Amz-Algorithm' in img_url)
                     print_info(f"  Image: {img_url[:100]}...")
-                    if is_presigned:
+                    if is_presigned_url(img_url):
                         print_info(f"  ✓ Pre-signed URL detected")
                     else:
                         print_info(f"  ⚠ Direct URL (not pre-signed)")
@@ -229,7 +238,7 @@ def test_get_items(token):
             return len(items)
         else:
             print_error(f"Get items failed: {response.status_code}")
-            print_error(f"Response: {response.text[:200]}")
+            print_error(f"Response: {response.content.decode()[:200]}")
             return 0
     except Exception as e:
         print_error(f"Get items error: {e}")
@@ -239,23 +248,9 @@ def test_get_categories(token):
     """Test get all categories endpoint"""
     print_header("4. GET ALL CATEGORIES")
     try:
-        # Try HTTP first
-        try:
-            response = requests.get(
-                f"{BASE_URL}/items/categories/",
-                headers={"Authorization": f"Token {token}"},
-                timeout=10
-            )
-        except:
-            # Fallback to Django test client
-            client = Client()
-            response = client.get(
-                '/items/categories/',
-                HTTP_AUTHORIZATION=f'Token {token}'
-            )
+        response = api_request('GET', '/items/categories/', token)
         if response.status_code == 200:
-            data = response.json()
-            categories = data.get('results', []) if isinstance(data, dict) else data
+            categories = get_results(response)
             
             print_success(f"Categories fetched: {response.status_code}")
             print_info(f"Total categories: {len(categories)}")
@@ -278,37 +273,14 @@ def test_get_item_detail(token):
     print_header("5. GET ITEM DETAIL")
     try:
         # First get items to get an ID
-        try:
-            response = requests.get(
-                f"{BASE_URL}/items/",
-                headers={"Authorization": f"Token {token}"},
-                timeout=10
-            )
-        except:
-            client = Client()
-            response = client.get(
-                '/items/',
-                HTTP_AUTHORIZATION=f'Token {token}'
-            )
+        response = fetch_items(token)
         if response.status_code == 200:
-            data = response.json()
-            items = data.get('results', []) if isinstance(data, dict) else data
+            items = get_results(response)
             if items:
                 item_id = items[0].get('id')
                 
                 # Get item detail
-                try:
-                    detail_response = requests.get(
-                        f"{BASE_URL}/items/{item_id}/",
-                        headers={"Authorization": f"Token {token}"},
-                        timeout=10
-                    )
-                except:
-                    client = Client()
-                    detail_response = client.get(
-                        f'/items/{item_id}/',
-                        HTTP_AUTHORIZATION=f'Token {token}'
-                    )
+                detail_response = api_request('GET', f'/items/{item_id}/', token)
                 if detail_response.status_code == 200:
                     item = detail_response.json()
                     print_success(f"Item detail fetched: {detail_response.status_code}")
@@ -324,41 +296,12 @@ def test_get_item_detail(token):
         print_error(f"Get item detail error: {e}")
         return False
 
-def test_create_bill(token):
-    """Test create bill (sales backup) endpoint"""
+def test_create_bill(token, vendor_data):
+    """Test create bill (sales backup) endpoint (vendor_data: vendor info returned by login)"""
     print_header("6. CREATE BILL (SALES BACKUP)")
     try:
-        client = Client()
-        
-        # Get vendor info first
-        try:
-            login_response = requests.post(
-                f"{BASE_URL}/auth/login",
-                json={"username": USERNAME, "password": PASSWORD},
-                timeout=10
-            )
-            vendor_data = login_response.json().get('vendor', {})
-        except:
-            login_response = client.post(
-                '/auth/login',
-                data={"username": USERNAME, "password": PASSWORD},
-                content_type='application/json'
-            )
-            vendor_data = login_response.json().get('vendor', {})
-        
         # Get an item for the bill
-        try:
-            items_response = requests.get(
-                f"{BASE_URL}/items/",
-                headers={"Authorization": f"Token {token}"},
-                timeout=10
-            )
-        except:
-            items_response = client.get(
-                '/items/',
-                HTTP_AUTHORIZATION=f'Token {token}'
-            )
-        items = items_response.json().get('results', []) if isinstance(items_response.json(), dict) else items_response.json()
+        items = get_results(fetch_items(token))
         
         if not items:
             print_warning("No items available for bill creation")
@@ -366,6 +309,13 @@ def test_create_bill(token):
         
         item = items[0]
         
+        # Bill amounts for 2 x item (GST is added on top only for exclusive prices)
+        mrp_price = float(item.get('mrp_price', 0))
+        gst_percentage = float(item.get('hsn_gst_percentage', 0))
+        quantity = 2
+        subtotal = mrp_price * quantity
+        tax = subtotal * gst_percentage / 100 if item.get('price_type') == 'exclusive' else 0
+        
         # Create GST bill
         bill_data = {
             "device_id": "test-device-001",
@@ -384,41 +334,28 @@ def test_create_bill(token):
                         "id": item.get('id'),
                         "name": item.get('name'),
                         "price": float(item.get('price', 0)),
-                        "mrp_price": float(item.get('mrp_price', 0)),
+                        "mrp_price": mrp_price,
                         "price_type": item.get('price_type'),
                         "hsn_code": item.get('hsn_code', ''),
-                        "hsn_gst_percentage": float(item.get('hsn_gst_percentage', 0)),
-                        "gst_percentage": float(item.get('hsn_gst_percentage', 0)), # Calculated from HSN
-                        "quantity": 2,
-                        "subtotal": float(item.get('mrp_price', 0)) * 2,
-                        "item_gst": float(item.get('mrp_price', 0)) * 2 * float(item.get('hsn_gst_percentage', 0)) / 100 if item.get('price_type') == 'exclusive' else 0
+                        "hsn_gst_percentage": gst_percentage,
+                        "gst_percentage": gst_percentage, # Calculated from HSN
+                        "quantity": quantity,
+                        "subtotal": subtotal,
+                        "item_gst": tax
                     }
                 ],
-                "subtotal": float(item.get('mrp_price', 0)) * 2,
-                "cgst": float(item.get('mrp_price', 0)) * 2 * float(item.get('hsn_gst_percentage', 0)) / 200 if item.get('price_type') == 'exclusive' else 0,
-                "sgst": float(item.get('mrp_price', 0)) * 2 * float(item.get('hsn_gst_percentage', 0)) / 200 if item.get('price_type') == 'exclusive' else 0,
+                "subtotal": subtotal,
+                "cgst": tax / 2,
+                "sgst": tax / 2,
                 "igst": 0.00,
-                "total_tax": float(item.get('mrp_price', 0)) * 2 * float(item.get('hsn_gst_percentage', 0)) / 100 if item.get('price_type') == 'exclusive' else 0,
-                "total": float(item.get('mrp_price', 0)) * 2 + (float(item.get('mrp_price', 0)) * 2 * float(item.get('hsn_gst_percentage', 0)) / 100 if item.get('price_type') == 'exclusive' else 0),
+                "total_tax": tax,
+                "total": subtotal + tax,
                 "footer_note": vendor_data.get('footer_note'),
                 "timestamp": datetime.now().isoformat()
             }
         }
         
-        try:
-            response = requests.post(
-                f"{BASE_URL}/backup/sync",
-                json=bill_data,
-                headers={"Authorization": f"Token {token}"},
-                timeout=10
-            )
-        except:
-            response = client.post(
-                '/backup/sync',
-                data=bill_data,
-                content_type='application/json',
-                HTTP_AUTHORIZATION=f'Token {token}'
-            )
+        response = api_request('POST', '/backup/sync', token, json=bill_data)
         
         if response.status_code in [200, 201]:
             print_success(f"Bill created: {response.status_code}")
@@ -430,7 +367,7 @@ def test_create_bill(token):
             return True
         else:
             print_error(f"Create bill failed: {response.status_code}")
-            print_error(f"Response: {response.text[:300]}")
+            print_error(f"Response: {response.content.decode()[:300]}")
             return False
     except Exception as e:
         print_error(f"Create bill error: {e}")
@@ -444,14 +381,16 @@ def test_database_data():
     try:
         vendor = Vendor.objects.get(user__username=USERNAME)
         items = Item.objects.filter(vendor=vendor, is_active=True)
-        categories = Category.objects.filter(vendor=vendor) | Category.objects.filter(vendor=None)
+        categories = Category.objects.filter(Q(vendor=vendor) | Q(vendor__isnull=True))
         bills = SalesBackup.objects.filter(vendor=vendor)
+        # Both item counts in one query
+        item_stats = items.aggregate(total=Count('id'), with_images=Count('id', filter=~Q(image='')))
         
         print_success("Database connection: OK")
         print_info(f"Vendor: {vendor.business_name}")
         print_info(f"Vendor logo: {'✅' if vendor.logo else '❌'}")
-        print_info(f"Items: {items.count()}")
-        print_info(f"Items with images: {items.exclude(image='').count()}")
+        print_info(f"Items: {item_stats['total']}")
+        print_info(f"Items with images: {item_stats['with_images']}")
         print_info(f"Categories: {categories.count()}")
         print_info(f"Bills: {bills.count()}")
         
@@ -475,57 +414,29 @@ def test_image_urls(token):
     """Test all image URLs are accessible"""
     print_header("8. IMAGE URL VERIFICATION")
     try:
-        try:
-            response = requests.get(
-                f"{BASE_URL}/items/",
-                headers={"Authorization": f"Token {token}"},
-                timeout=10
-            )
-        except:
-            client = Client()
-            response = client.get(
-                '/items/',
-                HTTP_AUTHORIZATION=f'Token {token}'
-            )
+        response = fetch_items(token)
         if response.status_code == 200:
-            data = response.json()
-            items = data.get('results', []) if isinstance(data, dict) else data
+            items = get_results(response)
             
             accessible = 0
             not_accessible = 0
             
             for item in items:
-                img_url = item.get('image_url')
-                if img_url:
-                    try:
-                        # Use GET instead of HEAD - pre-signed URLs work better with GET
-                        # Also check if URL is pre-signed (has query params)
-                        is_presigned = '?' in img_url and ('X-Amz-Algorithm' in img_url or 'X-Amz-Expires' in img_url)
-                        if is_presigned:
-                            # Pre-signed URL - use GET request
-                            img_response = requests.get(img_url, timeout=10, allow_redirects=True, stream=True)
-                            # For GET, we just need to check status, don't download full image
-                            img_response.close()
-                        else:
-                            # Direct URL - try HEAD first, fallback to GET
-                            try:
-                                img_response = requests.head(img_url, timeout=10, allow_redirects=True)
-                            except:
-                                img_response = requests.get(img_url, timeout=10, allow_redirects=True, stream=True)
-                                img_response.close()
-                        
-                        if img_response.status_code == 200:
-                            accessible += 1
-                        else:
-                            not_accessible += 1
-                            print_warning(f"  {item.get('name')}: {img_response.status_code}")
-                    except Exception as e:
-                        not_accessible += 1
-                        print_warning(f"  {item.get('name')}: Error - {str(e)[:50]}")
-                else:
+                if not item.get('image_url'):
                     not_accessible += 1
                     print_warning(f"  {item.get('name')}: No image URL")
             
+            # Check all image URLs in parallel (wall time ~ slowest URL, not the sum)
+            for item, status_code, e in check_item_images(items):
+                if e is not None:
+                    not_accessible += 1
+                    print_warning(f"  {item.get('name')}: Error - {str(e)[:50]}")
+                elif status_code == 200:
+                    accessible += 1
+                else:
+                    not_accessible += 1
+                    print_warning(f"  {item.get('name')}: {status_code}")
+            
             print_info(f"Accessible images: {accessible}/{len(items)}")
             print_info(f"Not accessible: {not_accessible}/{len(items)}")
             
@@ -548,7 +459,7 @@ def main():
     
     # Run tests
     results['health'] = test_health_check()
-    token = test_login()
+    token, vendor_data = test_login()
     results['login'] = token is not None
     
     if not token:
@@ -558,7 +469,7 @@ def main():
     results['items'] = test_get_items(token) > 0
     results['categories'] = test_get_categories(token) > 0
     results['item_detail'] = test_get_item_detail(token)
-    results['create_bill'] = test_create_bill(token)
+    results['create_bill'] = test_create_bill(token, vendor_data)
     results['database'] = test_database_data()
     results['images'] = test_image_urls(token)
     
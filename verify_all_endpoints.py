@@ -198,7 +198,7 @@ def test_authentication():
         print("✓ Authentication middleware configured")
         
         # Test REST framework authentication
-        assert 'rest_framework.authentication.TokenAuthentication' in settings.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'], "Token authentication configured"
+        assert 'backend.authentication.VendorTokenAuthentication' in settings.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'], "Token authentication configured"
         print("✓ Token authentication configured")
         
         return True